@@ -0,0 +1,38 @@
+import os.path as osp
+import time
+import numpy as np
+from data_utils import read_data, split_users
+from feature_utils import create_features
+from sklearn import metrics
+import sklearn2c
+
+# Float vs CMSIS-DSP fixed-point (Q15/Q31) features: extraction throughput,
+# feature error and Bayes classifier accuracy on the test users
+TIME_PERIODS = 64
+STEP_DISTANCE = 32
+PRECISIONS = ["float", "q31", "q15"]
+
+DATA_PATH = osp.join("WISDM_ar_v1.1", "WISDM_ar_v1.1_raw.txt")
+
+data_df = read_data(DATA_PATH)
+df_train, df_test = split_users(data_df, 28)
+
+reference = None
+for precision in PRECISIONS:
+    start = time.perf_counter()
+    test_segments_df, test_labels = create_features(df_test, TIME_PERIODS, STEP_DISTANCE, precision=precision)
+    elapsed = time.perf_counter() - start
+    if reference is None:
+        reference = test_segments_df.to_numpy()
+    # Worst error of every feature, relative to that feature's largest float value
+    error = np.abs(test_segments_df.to_numpy() - reference).max(axis=0) / np.abs(reference).max(axis=0)
+
+    # Train and test on features of the same precision, as a fixed-point build would see them
+    train_segments_df, train_labels = create_features(df_train, TIME_PERIODS, STEP_DISTANCE, precision=precision)
+    bayes = sklearn2c.BayesClassifier()
+    bayes.train(train_segments_df, train_labels)
+    accuracy = metrics.accuracy_score(test_labels, bayes.predict(test_segments_df))
+
+    print(f"{precision:>5}: {len(test_labels) / elapsed:10.0f} windows/s, accuracy {accuracy:.4f}, "
+          f"max relative feature error {error.max():.2e}")
+    print(f"       per feature: {np.array2string(error, precision=1)}")
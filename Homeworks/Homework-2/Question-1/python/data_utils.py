@@ -1,10 +1,224 @@
+import hashlib
+import json
+import os
+import warnings
+import numpy as np
 import pandas as pd
 
-def read_data(file_path):
-    column_names = ["user", "activity", "timestamp", "x-accel", "y-accel", "z-accel"]
-    df = pd.read_csv(file_path, header=None, names=column_names, on_bad_lines='skip')
-    df["z-accel"] = df["z-accel"].str.replace(";", "").astype(float)
-    df.dropna(inplace=True)
+# Bump when the cached column layout changes, old caches are then rebuilt
+CACHE_VERSION = 4
+
+def _file_hash(file_path):
+    sha = hashlib.sha1()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _cache_paths(file_path):
+    cache_dir = file_path + ".cache"
+    return cache_dir, os.path.join(cache_dir, "meta.json")
+
+def _write_meta(meta_path, meta):
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+def dataset_hash(file_path):
+    """
+    SHA-1 of the raw data file. Taken from the data cache while that is
+    still valid, otherwise the file is hashed.
+    """
+    _, meta_path = _cache_paths(file_path)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+        stat = os.stat(file_path)
+        if meta["size"] == stat.st_size and meta["mtime_ns"] == stat.st_mtime_ns:
+            return meta["sha1"]
+    except (OSError, ValueError, KeyError):
+        pass
+    return _file_hash(file_path)
+
+def load_cache(file_path):
+    """
+    Returns the cached dataframe of file_path, or None if there is no valid cache.
+
+    The cache is valid while the source file keeps its size and content hash.
+    The hash is only recomputed when the mtime changed, so a valid cache is
+    a handful of memory-mapped .npy reads.
+    """
+    cache_dir, meta_path = _cache_paths(file_path)
+    try:
+        with open(meta_path) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    stat = os.stat(file_path)
+    if meta.get("version") != CACHE_VERSION or meta["size"] != stat.st_size:
+        return None
+    if meta["mtime_ns"] != stat.st_mtime_ns:
+        if meta["sha1"] != _file_hash(file_path):
+            return None
+        meta["mtime_ns"] = stat.st_mtime_ns
+        _write_meta(meta_path, meta)
+
+    columns = {}
+    for name, classes in meta["columns"]:
+        values = np.load(os.path.join(cache_dir, name + ".npy"), mmap_mode="r")
+        if classes is not None:
+            # Categorical columns are stored as codes into their class table
+            values = pd.Categorical.from_codes(values, classes)
+        columns[name] = values
+    return pd.DataFrame(columns, copy=False)
+
+def save_cache(file_path, df):
+    """
+    Writes df as one typed .npy file per column next to file_path.
+    meta.json is written last, so a half-written cache is never used.
+    """
+    cache_dir, meta_path = _cache_paths(file_path)
+    stat = os.stat(file_path)
+    meta = {"version": CACHE_VERSION, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "sha1": _file_hash(file_path), "columns": []}
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        for name in df.columns:
+            values = df[name].to_numpy()
+            classes = None
+            if not pd.api.types.is_numeric_dtype(df[name]):
+                column = df[name].astype("category")
+                values = column.cat.codes.to_numpy()
+                classes = [str(c) for c in column.cat.categories]
+            np.save(os.path.join(cache_dir, name + ".npy"), values)
+            meta["columns"].append([name, classes])
+        _write_meta(meta_path, meta)
+    except OSError as e:
+        print(f"Could not write data cache to {cache_dir}: {e}")
+
+def parse_wisdm(file_path, column_names):
+    """
+    Parses the raw WISDM text file in a single pass of pandas' C tokenizer.
+
+    The trailing ';' of every record is treated as a comment, so the last
+    column is read as a number directly. Returns the dataframe with integer
+    user/timestamp and float accelerations, plus a dict counting the lines
+    that were skipped and why.
+    """
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always", pd.errors.ParserWarning)
+        df = pd.read_csv(file_path, header=None, names=column_names, engine="c",
+                         comment=";", on_bad_lines="warn")
+    too_many_fields = 0
+    for w in caught:
+        if issubclass(w.category, pd.errors.ParserWarning) and "Skipping line" in str(w.message):
+            too_many_fields += str(w.message).count("Skipping line")
+        else:
+            # Not a skipped line, so it goes to the caller's warning filters as usual
+            warnings.warn_explicit(w.message, w.category, w.filename, w.lineno, source=w.source)
+
+    # Missing or empty fields come back as NaN
+    empty = df.isna().any(axis=1)
+    numeric_names = [name for name in column_names if name != "activity"]
+    df[numeric_names] = df[numeric_names].apply(pd.to_numeric, errors="coerce")
+    non_numeric = df.isna().any(axis=1) & ~empty
+
+    df = df[~(empty | non_numeric)]
+    df = df.astype({column_names[0]: np.int64, column_names[2]: np.int64})
+
+    skipped = {"too_many_fields": too_many_fields,
+               "empty_field": int(empty.sum()),
+               "non_numeric": int(non_numeric.sum())}
+    return df, skipped
+
+# Stable activity class table, the codes match ACTIVITY_MAP in Homework-5 test_har.py
+ACTIVITY_CLASSES = ["Downstairs", "Jogging", "Sitting", "Standing", "Upstairs", "Walking"]
+
+def compact_frame(df):
+    """
+    Same columns as the parsed frame in narrow dtypes: activity becomes a
+    categorical over ACTIVITY_CLASSES (int8 codes), user int8 and the
+    accelerations float32. Rows with an unknown activity are dropped.
+    """
+    activity = pd.Categorical(df["activity"], categories=ACTIVITY_CLASSES)
+    keep = activity.codes >= 0
+    return pd.DataFrame({
+        "user": df["user"].to_numpy(np.int8)[keep],
+        "activity": activity[keep],
+        "timestamp": df["timestamp"].to_numpy(np.int64)[keep],
+        "x-accel": df["x-accel"].to_numpy(np.float32)[keep],
+        "y-accel": df["y-accel"].to_numpy(np.float32)[keep],
+        "z-accel": df["z-accel"].to_numpy(np.float32)[keep]
+    })
+
+def sort_by_user(df):
+    """
+    Returns df sorted by user, so every user is one contiguous block of
+    rows. The sort is stable: within a user, rows keep their file order.
+    WISDM timestamps are per-session uptimes (some are 0), so sorting by them
+    would interleave sessions.
+    """
+    order = np.argsort(df["user"].to_numpy(), kind="stable")
+    return df.iloc[order].reset_index(drop=True)
+
+def user_offsets(df):
+    """
+    Offset table {user: (start, stop)} of a frame sorted by user.
+    """
+    users = df["user"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, users[1:] != users[:-1]])
+    stops = np.append(starts[1:], len(users))
+    return {int(users[a]): (int(a), int(b)) for a, b in zip(starts, stops)}
+
+def select_users(df, users):
+    """
+    Rows of the given users from a frame sorted by user.
+
+    Each user's block is found by binary search. Neighbouring users merge
+    into a single zero-copy slice, and only separate blocks are concatenated.
+    """
+    column = df["user"].to_numpy()
+    users = np.sort(np.atleast_1d(users))
+    starts = np.searchsorted(column, users, side="left")
+    stops = np.searchsorted(column, users, side="right")
+
+    blocks = []
+    for start, stop in zip(starts, stops):
+        if start == stop:
+            continue
+        if blocks and blocks[-1][1] == start:
+            blocks[-1][1] = stop
+        else:
+            blocks.append([start, stop])
+
+    if len(blocks) <= 1:
+        start, stop = blocks[0] if blocks else (0, 0)
+        return df.iloc[start:stop]
+    return pd.concat([df.iloc[start:stop] for start, stop in blocks], ignore_index=True)
+
+def user_view(df, user):
+    """
+    Rows of a single user as a zero-copy slice of a frame sorted by user.
+    """
+    return select_users(df, [user])
+
+def split_users(df, last_train_user):
+    """
+    Splits a frame sorted by user into (users <= last_train_user, the rest),
+    both zero-copy slices.
+    """
+    split = np.searchsorted(df["user"].to_numpy(), last_train_user, side="right")
+    return df.iloc[:split], df.iloc[split:]
+
+def read_data(file_path, use_cache=True):
+    df = load_cache(file_path) if use_cache else None
+    if df is None:
+        column_names = ["user", "activity", "timestamp", "x-accel", "y-accel", "z-accel"]
+        df, skipped = parse_wisdm(file_path, column_names)
+        print(f"Skipped lines: {skipped}")
+        df = sort_by_user(compact_frame(df))
+        if use_cache:
+            save_cache(file_path, df)
     print(f"Number of columns in the dataframe: {df.shape[1]}")
     print(f"Number of rows in the dataframe: {df.shape[0]}")
     return df
\ No newline at end of file
@@ -1,67 +1,511 @@
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
 import numpy as np
 import pandas as pd
 
-def create_features(df, time_steps, step_size):
-    x_segments = []
-    y_segments = []
-    z_segments = []
-    labels = []
-    
-    for i in range(0, len(df) - time_steps, step_size):
-        xs = df["x-accel"].values[i : i + time_steps]
-        ys = df["y-accel"].values[i : i + time_steps]
-        zs = df["z-accel"].values[i : i + time_steps]
-
-        count_per_label = df["activity"][i : i + time_steps].value_counts()
-        if not count_per_label.empty:
-            label_count = count_per_label.iloc[0]
-            if label_count == time_steps:
-                labels.append(count_per_label.index[0])
-                x_segments.append(xs)
-                y_segments.append(ys)
-                z_segments.append(zs)
-
-    segments_df = pd.DataFrame({
-        "x_segments": x_segments,
-        "y_segments": y_segments,
-        "z_segments": z_segments
-    })
-    
-    feature_df = pd.DataFrame()
-    
-    # 1. Mean
-    feature_df['x_mean'] = segments_df["x_segments"].apply(lambda x: x.mean())
-    feature_df['y_mean'] = segments_df["y_segments"].apply(lambda x: x.mean())
-    feature_df['z_mean'] = segments_df["z_segments"].apply(lambda x: x.mean())
-
-    # 2. Positive Count
-    feature_df['x_pos_count'] = segments_df["x_segments"].apply(lambda x: np.sum(x > 0))
-    feature_df['y_pos_count'] = segments_df["y_segments"].apply(lambda x: np.sum(x > 0))
-    feature_df['z_pos_count'] = segments_df["z_segments"].apply(lambda x: np.sum(x > 0))
-    
-    def get_fft_features(series):
-        # 1. Compute RFFT
-        fft_vals = np.abs(np.fft.rfft(series))
-        # 2. Slice EXACTLY how the C code sees it (Indices 1 to 31)
-        # [1:32] means start at 1, stop BEFORE 32.
-        valid_fft = fft_vals[1:32] 
-        return valid_fft.std(), np.sum(valid_fft)
-
-    # Apply to X, Y, Z
-    x_feats = segments_df["x_segments"].apply(get_fft_features)
-    y_feats = segments_df["y_segments"].apply(get_fft_features)
-    z_feats = segments_df["z_segments"].apply(get_fft_features)
-
-    # 3. FFT Std Dev
-    feature_df['x_std_fft'] = x_feats.apply(lambda x: x[0])
-    feature_df['y_std_fft'] = y_feats.apply(lambda x: x[0])
-    feature_df['z_std_fft'] = z_feats.apply(lambda x: x[0])
-
-    # 4. FFT SMA (Scaled by 32 as per C code)
-    scaling_factor = 32.0 
-    feature_df['sma_fft'] = (x_feats.apply(lambda x: x[1]) + 
-                             y_feats.apply(lambda x: x[1]) + 
-                             z_feats.apply(lambda x: x[1])) / scaling_factor
-
-    labels = np.asarray(labels)
-    return feature_df, labels
\ No newline at end of file
+try:
+    import cmsisdsp as dsp
+except ImportError:
+    # Only the fixed-point (precision="q15"/"q31") features need CMSIS-DSP
+    dsp = None
+
+AXES = ["x-accel", "y-accel", "z-accel"]
+
+FEATURE_NAMES = [
+    "x_mean", "y_mean", "z_mean",
+    "x_pos_count", "y_pos_count", "z_pos_count",
+    "x_std_fft", "y_std_fft", "z_std_fft",
+    "sma_fft"
+]
+
+# FFT SMA scaling: 32 on the MCU (C code) path, 50 in the book
+SMA_SCALE_MCU = 32.0
+SMA_SCALE_BOOK = 50.0
+
+# The C code only uses FFT indices 1 to 31: [1:32] means start at 1, stop BEFORE 32
+FFT_STOP = 32
+
+# Fixed-point features: accelerations are divided by this before quantising to Q15/Q31,
+# WISDM readings stay within +-20 m/s^2
+ACCEL_FULL_SCALE = 32.0
+
+# CMSIS rfft instances of fixed_point_features, one per precision and length
+_rfft_instances = {}
+
+# Bump when the feature definitions change, older FeatureStore entries are then never hit
+FEATURE_VERSION = 1
+
+def _activity_codes(activity):
+    # Integer code per sample plus the (sorted) class table the codes index into
+    codes, classes = pd.factorize(activity, sort=True)
+    return codes, np.asarray(classes)
+
+class RunIndex:
+    """
+    Run-length index over one or more per-sample key columns (e.g. activity and user).
+
+    A run is a maximal stretch of consecutive samples where no key changes.
+    Built once in O(n); after that a window [i, i + T) is single-run iff its
+    first and last sample share a run id, which is an O(1) check.
+    """
+
+    def __init__(self, *keys):
+        self.length = len(keys[0])
+        change = np.zeros(max(self.length - 1, 0), dtype=bool)
+        for key in keys:
+            key = np.asarray(key)
+            change |= key[1:] != key[:-1]
+
+        self.run_id = np.concatenate(([0], np.cumsum(change)))
+        self.run_starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+        self.run_ends = np.append(self.run_starts[1:], self.length)
+
+    def is_pure(self, start, time_steps):
+        return self.run_id[start] == self.run_id[start + time_steps - 1]
+
+    def valid_starts(self, time_steps, step_size):
+        """
+        All starts of range(0, length - time_steps, step_size) whose window
+        stays inside one run, computed per run instead of per window.
+        """
+        last_start = self.length - time_steps - 1
+        first = -(-self.run_starts // step_size) * step_size
+        last = np.minimum(self.run_ends - time_steps, last_start)
+        counts = np.maximum((last - first) // step_size + 1, 0)
+
+        # Expand every run's [first, last] grid in one go
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(first, counts) + offsets * step_size
+
+def window_starts(df, time_steps, step_size, pure=True):
+    """
+    Start row and label of every window that is kept.
+
+    Window starts come from range(0, len(df) - time_steps, step_size) and
+    windows that straddle a user change are rejected. If pure is True only
+    windows with a single activity are kept, otherwise every window is
+    labelled with its most frequent activity.
+    """
+    codes, classes = _activity_codes(df["activity"])
+    users = df["user"].to_numpy()
+
+    if pure:
+        starts = RunIndex(codes, users).valid_starts(time_steps, step_size)
+        return starts, classes[codes[starts]]
+
+    starts = RunIndex(users).valid_starts(time_steps, step_size)
+    if len(starts) == 0:
+        return starts, classes[:0]
+    # Most frequent code per window, ties go to the first class (like mode())
+    code_windows = np.lib.stride_tricks.sliding_window_view(codes, time_steps)[starts]
+    counts = np.stack([(code_windows == c).sum(axis=1) for c in range(len(classes))], axis=1)
+    return starts, classes[counts.argmax(axis=1)]
+
+def _gather_windows(values, starts, time_steps):
+    if len(starts) == 0:
+        return np.empty((0, time_steps, values.shape[1]), values.dtype)
+    # (n_windows, 3, time_steps) strided views -> (n_windows, time_steps, 3)
+    windows = np.lib.stride_tricks.sliding_window_view(values, time_steps, axis=0)[starts]
+    return np.ascontiguousarray(windows.transpose(0, 2, 1))
+
+def segment_windows(df, time_steps, step_size, pure=True):
+    """
+    Cuts the dataframe into (n_windows, time_steps, 3) windows in one pass.
+
+    Windows are strided views over the x/y/z columns, so only the windows
+    kept by window_starts are copied.
+    """
+    starts, labels = window_starts(df, time_steps, step_size, pure)
+    return _gather_windows(df[AXES].to_numpy(), starts, time_steps), labels
+
+def compute_features(windows, fft_stop, sma_scale):
+    """
+    Computes the 10 HAR features for a whole (n_windows, time_steps, 3) tensor.
+
+    A single rfft runs over the time axis of every window and axis, the
+    features are plain array reductions. FFT bins [1:fft_stop] are used.
+    Returns a float32 (n_windows, 10) matrix ordered as FEATURE_NAMES.
+    """
+    mean = windows.mean(axis=1)
+    pos_count = (windows > 0).sum(axis=1)
+    std_fft, sma_fft = _spectrum_features(windows, fft_stop, sma_scale)
+
+    return np.column_stack([mean, pos_count, std_fft, sma_fft]).astype(np.float32)
+
+def _spectrum_features(windows, fft_stop, sma_scale):
+    # FFT std dev per axis and FFT signal magnitude area of every window,
+    # shared by compute_features and sweep_features
+    spectrum = np.abs(np.fft.rfft(windows, axis=1))[:, 1:fft_stop, :]
+    return spectrum.std(axis=1), spectrum.sum(axis=(1, 2)) / sma_scale
+
+def _fixed_rfft(precision, time_steps):
+    # CMSIS rfft instance of a precision and length, initialised once
+    key = (precision, time_steps)
+    if key not in _rfft_instances:
+        rfft = getattr(dsp, f"arm_rfft_instance_{precision}")()
+        if getattr(dsp, f"arm_rfft_init_{precision}")(rfft, time_steps, 0, 1) != 0:
+            raise ValueError(f"CMSIS-DSP has no {precision} rfft of length {time_steps}")
+        _rfft_instances[key] = rfft
+    return _rfft_instances[key]
+
+def fixed_point_features(windows, fft_stop=FFT_STOP, sma_scale=SMA_SCALE_MCU, precision="q15"):
+    """
+    The 10 HAR features of a (n_windows, time_steps, 3) tensor computed in
+    fixed point with the CMSIS-DSP Q15/Q31 kernels arm_mean, arm_rfft,
+    arm_cmplx_mag, arm_shift and arm_std, to study how the features would
+    degrade in fixed point.
+
+    These match no firmware: har_feature_extraction.c is float only
+    (arm_rfft_fast_f32, arm_std_f32). A Q15/Q31 firmware only reproduces
+    them if it runs the same kernels, including the Q15 shift below.
+
+    Samples are divided by ACCEL_FULL_SCALE and quantised with one call and
+    arm_cmplx_mag runs once over every spectrum, but arm_rfft, arm_mean and
+    arm_std are still called from Python per window and axis, which makes
+    this slower than compute_features. Results are scaled back to float units, so
+    they line up with compute_features. arm_std returns the sample (N - 1)
+    standard deviation.
+
+    The magnitudes are tiny next to the full Q range (the rfft and
+    arm_cmplx_mag scaling plus the headroom of ACCEL_FULL_SCALE) and
+    arm_std_q15 rounds the variance to Q15, which would zero most Q15 stds.
+    Every Q15 magnitude row is therefore shifted left by its block exponent
+    with arm_shift_q15 before arm_std_q15 and the std is scaled back by the
+    same power of two. arm_std_q31 keeps enough bits without it.
+    Returns a float32 (n_windows, 10) matrix ordered as FEATURE_NAMES.
+    """
+    if dsp is None:
+        raise ImportError("Fixed-point features need the cmsisdsp package")
+    if precision not in ("q15", "q31"):
+        raise ValueError(f"Unknown precision {precision!r}, expected 'q15' or 'q31'")
+    to_fixed = getattr(dsp, f"arm_float_to_{precision}")
+    lsb = 2.0 ** -15 if precision == "q15" else 2.0 ** -31
+    rfft_fixed = getattr(dsp, f"arm_rfft_{precision}")
+    mean_fixed = getattr(dsp, f"arm_mean_{precision}")
+    std_fixed = getattr(dsp, f"arm_std_{precision}")
+    cmplx_mag = getattr(dsp, f"arm_cmplx_mag_{precision}")
+
+    n_windows, time_steps, _ = windows.shape
+    rfft = _fixed_rfft(precision, time_steps)
+    if n_windows == 0:
+        return np.empty((0, len(FEATURE_NAMES)), np.float32)
+
+    # One row per window and axis, in the axis-major order the C code uses
+    rows = windows.transpose(0, 2, 1).reshape(-1, time_steps) / ACCEL_FULL_SCALE
+    samples = to_fixed(rows.ravel()).reshape(rows.shape)
+    # arm_rfft scales its output down by time_steps, arm_cmplx_mag halves it again
+    magnitude_scale = 2 * time_steps * ACCEL_FULL_SCALE
+
+    # Output buffers are allocated once, the loops only fill them
+    spectra = np.empty((len(samples), time_steps), samples.dtype)
+    means = np.empty(len(samples), samples.dtype)
+    stds = np.empty(len(samples), samples.dtype)
+    for row_idx, row in enumerate(samples):
+        spectra[row_idx] = rfft_fixed(rfft, row)[:time_steps]
+        means[row_idx] = mean_fixed(row)
+    magnitudes = cmplx_mag(spectra.ravel()).reshape(len(samples), time_steps // 2)[:, 1:fft_stop]
+
+    shifts = np.zeros(len(magnitudes), np.int64)
+    if precision == "q15":
+        # Block exponent of every row: the left shift that brings its largest magnitude
+        # just under full scale (frexp's exponent is the bit length of the integer)
+        shifts = 15 - np.frexp(np.maximum(magnitudes.max(axis=1), 1))[1]
+        for row_idx, (row, shift) in enumerate(zip(magnitudes, shifts)):
+            stds[row_idx] = std_fixed(dsp.arm_shift_q15(row, int(shift)))
+    else:
+        for row_idx, row in enumerate(magnitudes):
+            stds[row_idx] = std_fixed(row)
+
+    mean = means.reshape(n_windows, 3) * (lsb * ACCEL_FULL_SCALE)
+    pos_count = (samples > 0).sum(axis=1).reshape(n_windows, 3)
+    std_fft = (stds * np.ldexp(lsb * magnitude_scale, -shifts)).reshape(n_windows, 3)
+    magnitude_sums = magnitudes.sum(axis=1, dtype=np.int64).reshape(n_windows, 3).sum(axis=1)
+    sma_fft = magnitude_sums * (lsb * magnitude_scale) / sma_scale
+
+    return np.column_stack([mean, pos_count, std_fft, sma_fft]).astype(np.float32)
+
+def _features_at(values, starts, time_steps, fft_stop, sma_scale, precision="float"):
+    windows = _gather_windows(values, starts, time_steps)
+    if precision != "float":
+        return fixed_point_features(windows, fft_stop, sma_scale, precision)
+    return compute_features(windows, fft_stop, sma_scale)
+
+def _shard_features(shm_name, shape, dtype, starts, time_steps, fft_stop, sma_scale, precision):
+    # Runs in a worker process, the x/y/z samples are read from shared memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        return _features_at(values, starts, time_steps, fft_stop, sma_scale, precision)
+    finally:
+        del values
+        shm.close()
+
+def parallel_features(df, starts, time_steps, fft_stop, sma_scale, n_jobs=None, precision="float"):
+    """
+    compute_features for the windows at starts, computed in worker processes.
+
+    Work is sharded by user, one shard per user block. Workers read the x/y/z
+    samples from a single shared memory block instead of a pickled dataframe.
+    Shards are merged in start order, so the result is identical to the
+    serial path. n_jobs=None or -1 uses every core, other values below 1
+    raise ValueError. With a single shard or worker the features are computed
+    in this process, without a pool.
+    """
+    if n_jobs is None or n_jobs == -1:
+        n_jobs = os.cpu_count()
+    elif n_jobs < 1:
+        raise ValueError(f"n_jobs must be None, -1 or a positive number of processes, got {n_jobs}")
+    if len(starts) == 0:
+        return np.empty((0, len(FEATURE_NAMES)), np.float32)
+
+    values = np.ascontiguousarray(df[AXES].to_numpy())
+    users = df["user"].to_numpy()[starts]
+    shards = np.split(starts, np.flatnonzero(users[1:] != users[:-1]) + 1)
+    if min(n_jobs, len(shards)) == 1:
+        return _features_at(values, starts, time_steps, fft_stop, sma_scale, precision)
+
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    try:
+        np.ndarray(values.shape, values.dtype, buffer=shm.buf)[:] = values
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(shards))) as pool:
+            features = list(pool.map(_shard_features, repeat(shm.name), repeat(values.shape),
+                                     repeat(values.dtype.str), shards, repeat(time_steps),
+                                     repeat(fft_stop), repeat(sma_scale), repeat(precision)))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return np.concatenate(features)
+
+class FeatureStore:
+    """
+    On-disk cache of feature matrices and labels, one .npz file per key.
+
+    Keys are content addressed (see key), so a changed dataset or feature
+    parameter simply misses the cache. Entries older than max_age seconds
+    are evicted, then the least recently used ones until the store fits
+    in max_bytes. Either limit can be None.
+    """
+
+    def __init__(self, store_dir, max_bytes=None, max_age=None):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(store_dir, exist_ok=True)
+
+    @staticmethod
+    def key(**parts):
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.store_dir, key + ".npz")
+
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                feature_df = pd.DataFrame(entry["features"], columns=list(entry["columns"]))
+                labels = entry["labels"]
+                if labels.dtype.kind == "U":
+                    labels = labels.astype(object)
+        except (OSError, ValueError, KeyError):
+            return None
+        # The access time drives least recently used eviction
+        os.utime(path)
+        return feature_df, labels
+
+    def save(self, key, feature_df, labels):
+        # Written under a temporary name first so readers never see half a file
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, features=feature_df.to_numpy(), columns=np.asarray(feature_df.columns, dtype=str),
+                     labels=np.asarray(labels, dtype=str if labels.dtype == object else labels.dtype))
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.store_dir):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.store_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, name in entries:
+            too_old = self.max_age is not None and now - mtime > self.max_age
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big):
+                continue
+            os.remove(os.path.join(self.store_dir, name))
+            total -= size
+
+def create_features(df, time_steps, step_size, sma_scale=SMA_SCALE_MCU, n_jobs=1, precision="float"):
+    # Slice the FFT EXACTLY how the C code sees it, SMA scaled by 32 as per C code
+    # n_jobs other than 1 extracts the features in worker processes, one user per shard
+    # precision="q15"/"q31" computes fixed-point features with CMSIS-DSP kernels, see fixed_point_features
+    starts, labels = window_starts(df, time_steps, step_size)
+    if n_jobs == 1:
+        features = _features_at(df[AXES].to_numpy(), starts, time_steps, FFT_STOP, sma_scale, precision)
+    else:
+        features = parallel_features(df, starts, time_steps, FFT_STOP, sma_scale, n_jobs, precision)
+    feature_df = pd.DataFrame(features, columns=FEATURE_NAMES)
+
+    return feature_df, labels
+
+def sweep_features(df, grid, sma_scale=SMA_SCALE_MCU):
+    """
+    create_features for every (time_steps, step_size) pair in grid, returned
+    as a dict {(time_steps, step_size): (feature_df, labels)}.
+
+    Cumulative sums of the samples and of their positive indicators are built
+    once for the whole sweep, so the mean and positive count of any window
+    are two lookups instead of a pass over its samples, and the activity runs
+    are indexed once. Only the FFT features are computed per window, by the
+    same code as in compute_features.
+    """
+    values = df[AXES].to_numpy()
+    codes, classes = _activity_codes(df["activity"])
+    sums = np.zeros((len(values) + 1, 3))
+    np.cumsum(values, axis=0, dtype=np.float64, out=sums[1:])
+    positives = np.zeros((len(values) + 1, 3), np.int64)
+    np.cumsum(values > 0, axis=0, out=positives[1:])
+    index = RunIndex(codes, df["user"].to_numpy())
+
+    sweep = {}
+    for time_steps, step_size in grid:
+        starts = index.valid_starts(time_steps, step_size)
+        ends = starts + time_steps
+        mean = (sums[ends] - sums[starts]) / time_steps
+        pos_count = positives[ends] - positives[starts]
+        labels = classes[codes[starts]]
+        windows = _gather_windows(values, starts, time_steps)
+        std_fft, sma_fft = _spectrum_features(windows, FFT_STOP, sma_scale)
+
+        features = np.column_stack([mean, pos_count, std_fft, sma_fft]).astype(np.float32)
+        sweep[(time_steps, step_size)] = (pd.DataFrame(features, columns=FEATURE_NAMES), labels)
+    return sweep
+
+class OnlineFeatureExtractor:
+    """
+    Computes the create_features features from a live stream of x/y/z samples.
+
+    Samples go into a ring buffer of time_steps samples, so memory stays
+    bounded. Running sums keep the mean and positive count up to date in O(1)
+    per sample. Only the FFT terms are recomputed when a window is emitted,
+    every step_size samples. A window is emitted when its start position is a
+    multiple of step_size, positions counting from the start passed to reset,
+    which is how create_features places its windows in the dataframe. The
+    time each emit took is kept in latencies (seconds), for the last
+    latency_window emits only, so a long-running stream does not grow it.
+    """
+
+    def __init__(self, time_steps, step_size, fft_stop=FFT_STOP, sma_scale=SMA_SCALE_MCU,
+                 latency_window=1000):
+        self.time_steps = time_steps
+        self.step_size = step_size
+        self.fft_stop = fft_stop
+        self.sma_scale = sma_scale
+        self.latencies = deque(maxlen=latency_window)
+        self.reset()
+
+    def reset(self, start=0):
+        # Start a new stream, e.g. after a user or activity change, whose first
+        # sample is at position start
+        self.buffer = np.zeros((self.time_steps, 3))
+        self.head = 0
+        self.start = start
+        self.count = 0
+        self.sums = np.zeros(3)
+        self.pos_counts = np.zeros(3, dtype=np.int64)
+
+    def push(self, sample):
+        """
+        Adds one (x, y, z) sample. Returns the feature vector when it completes
+        a window, otherwise None.
+        """
+        sample = np.asarray(sample, dtype=np.float64)
+        if self.count >= self.time_steps:
+            oldest = self.buffer[self.head]
+            self.sums -= oldest
+            self.pos_counts -= oldest > 0
+        self.buffer[self.head] = sample
+        self.sums += sample
+        self.pos_counts += sample > 0
+        self.head = (self.head + 1) % self.time_steps
+        self.count += 1
+
+        if self.count >= self.time_steps and (self.start + self.count - self.time_steps) % self.step_size == 0:
+            return self._emit()
+        return None
+
+    def push_many(self, samples):
+        # Small batches of samples, returns the feature vectors they complete
+        features = (self.push(sample) for sample in samples)
+        return [f for f in features if f is not None]
+
+    def _emit(self):
+        start = time.perf_counter()
+        # Oldest sample first, as in the offline window
+        window = np.roll(self.buffer, -self.head, axis=0)
+        spectrum = np.abs(np.fft.rfft(window, axis=0))[1:self.fft_stop]
+        features = np.concatenate([
+            self.sums / self.time_steps,
+            self.pos_counts,
+            spectrum.std(axis=0),
+            [spectrum.sum() / self.sma_scale]
+        ]).astype(np.float32)
+        self.latencies.append(time.perf_counter() - start)
+        return features
+
+def replay_stream(df, time_steps, step_size, sma_scale=SMA_SCALE_MCU):
+    """
+    Replays a WISDM dataframe sample by sample through an OnlineFeatureExtractor,
+    as a sensor feed would deliver it. The stream restarts at every user or
+    activity change, at the row position of the change, so the windows are the
+    ones window_starts(df, time_steps, step_size) keeps. Like there, the last
+    row of df never ends a window. Yields (feature vector, activity, extractor)
+    per window.
+    """
+    extractor = OnlineFeatureExtractor(time_steps, step_size, sma_scale=sma_scale)
+    values = df[AXES].to_numpy()
+    activity = df["activity"].to_numpy()
+    index = RunIndex(activity, df["user"].to_numpy())
+
+    for start, stop in zip(index.run_starts, np.minimum(index.run_ends, len(df) - 1)):
+        extractor.reset(start)
+        for sample in values[start:stop]:
+            features = extractor.push(sample)
+            if features is not None:
+                yield features, activity[start], extractor
+
+def _rows_hash(df):
+    # Identifies the rows of df, so two slices of the same users (or of the same
+    # file with other rows dropped) never share a cache entry
+    return hashlib.sha1(pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes()).hexdigest()
+
+def cached_features(store, data_hash, df, time_steps, step_size, sma_scale=SMA_SCALE_MCU, n_jobs=1,
+                    precision="float"):
+    """
+    create_features through a FeatureStore. The key covers the raw file hash
+    (see dataset_hash), the users and rows of df, the segmentation parameters,
+    the feature set version, the SMA scaling and the arithmetic precision.
+    """
+    key = store.key(data_hash=data_hash, users=np.unique(df["user"].to_numpy()).tolist(), rows=_rows_hash(df),
+                    time_steps=time_steps, step_size=step_size, fft_stop=FFT_STOP,
+                    version=FEATURE_VERSION, sma_scale=sma_scale, precision=precision)
+    cached = store.load(key)
+    if cached is not None:
+        return cached
+
+    feature_df, labels = create_features(df, time_steps, step_size, sma_scale, n_jobs,
+                                         precision=precision)
+    store.save(key, feature_df, labels)
+    return feature_df, labels
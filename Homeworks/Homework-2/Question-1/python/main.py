@@ -1,6 +1,6 @@
 import os.path as osp
-from data_utils import read_data
-from feature_utils import create_features
+from data_utils import read_data, split_users, dataset_hash
+from feature_utils import FeatureStore, cached_features
 from sklearn import metrics
 import sklearn2c
 from matplotlib import pyplot as plt
@@ -11,15 +11,17 @@ STEP_DISTANCE = 32
 # -------------------------------------------------------------
 
 DATA_PATH = osp.join("WISDM_ar_v1.1", "WISDM_ar_v1.1_raw.txt")
+FEATURE_STORE_DIR = "feature_cache"
 
 # Read and Filter Data
 data_df = read_data(DATA_PATH)
-df_train = data_df[data_df["user"] <= 28]
-#df_test = data_df[data_df["user"] > 28]
+df_train, df_test = split_users(data_df, 28)
 
-# Extract Features
-train_segments_df, train_labels = create_features(df_train, TIME_PERIODS, STEP_DISTANCE)
-#test_segments_df, test_labels = create_features(df_test, TIME_PERIODS, STEP_DISTANCE)
+# Extract Features (reused from the feature store when nothing changed)
+store = FeatureStore(FEATURE_STORE_DIR)
+data_hash = dataset_hash(DATA_PATH)
+train_segments_df, train_labels = cached_features(store, data_hash, df_train, TIME_PERIODS, STEP_DISTANCE)
+#test_segments_df, test_labels = cached_features(store, data_hash, df_test, TIME_PERIODS, STEP_DISTANCE)
 
 # Train Bayes Classifier
 bayes = sklearn2c.BayesClassifier()
@@ -1,7 +1,8 @@
 import serial
 import time
 import numpy as np
-from data_utils import read_data
+from data_utils import read_data, split_users
+from feature_utils import RunIndex
 import os.path as osp
 import struct
 import sys
@@ -15,24 +16,17 @@ STEP_DISTANCE = 32
 print("Loading Data...")
 DATA_PATH = osp.join("WISDM_ar_v1.1", "WISDM_ar_v1.1_raw.txt")
 data_df = read_data(DATA_PATH)
-df_test = data_df[data_df["user"] > 28]
+_, df_test = split_users(data_df, 28)
 
-segments = []
-labels = []
+# Prepare Data (X, Y, Z arrays), only windows with one activity of one user
+index = RunIndex(df_test["activity"].values, df_test["user"].values)
+starts = index.valid_starts(TIME_PERIODS, STEP_DISTANCE)
+values = df_test[["x-accel", "y-accel", "z-accel"]].to_numpy()
+windows = np.lib.stride_tricks.sliding_window_view(values, TIME_PERIODS, axis=0)[starts]
 
-# Prepare Data (X, Y, Z arrays)
-for i in range(0, len(df_test) - TIME_PERIODS, STEP_DISTANCE):
-    try:
-        act_slice = df_test["activity"].values[i : i + TIME_PERIODS]
-        if np.all(act_slice == act_slice[0]):
-            xs = df_test["x-accel"].values[i : i + TIME_PERIODS]
-            ys = df_test["y-accel"].values[i : i + TIME_PERIODS]
-            zs = df_test["z-accel"].values[i : i + TIME_PERIODS]
-            # Python sends X array, then Y array, then Z array
-            segments.append(np.concatenate([xs, ys, zs]))
-            labels.append(act_slice[0])
-    except:
-        continue
+# Python sends X array, then Y array, then Z array
+segments = windows.reshape(len(starts), 3 * TIME_PERIODS)
+labels = list(df_test["activity"].values[starts])
 
 # IMPORTANT: Sklearn classes are usually alphabetical.
 # 0:Downstairs, 1:Jogging, 2:Sitting, 3:Standing, 4:Upstairs, 5:Walking
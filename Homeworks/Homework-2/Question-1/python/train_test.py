@@ -3,13 +3,14 @@ import numpy as np
 from sklearn import metrics
 import sklearn2c
 import matplotlib.pyplot as plt
-from data_utils import read_data
-from feature_utils import create_features
+from data_utils import read_data, split_users, dataset_hash
+from feature_utils import FeatureStore, cached_features
 
 # --- CONFIGURATION (Must match your MCU settings) ---
 TIME_PERIODS = 64
 STEP_DISTANCE = 32
 # ----------------------------------------------------
+FEATURE_STORE_DIR = "feature_cache"
 
 def main():
     # 1. Load Data
@@ -19,13 +20,14 @@ def main():
 
     # 2. Split Data (Same split as before)
     print("2. Splitting Train/Test...")
-    df_train = data_df[data_df["user"] <= 28]
-    df_test = data_df[data_df["user"] > 28]
+    df_train, df_test = split_users(data_df, 28)
 
     # 3. Feature Extraction
-    print("3. Extracting Features (this takes a few seconds)...")
-    train_X, train_y = create_features(df_train, TIME_PERIODS, STEP_DISTANCE)
-    test_X, test_y = create_features(df_test, TIME_PERIODS, STEP_DISTANCE)
+    print("3. Extracting Features (cached in the feature store)...")
+    store = FeatureStore(FEATURE_STORE_DIR)
+    data_hash = dataset_hash(DATA_PATH)
+    train_X, train_y = cached_features(store, data_hash, df_train, TIME_PERIODS, STEP_DISTANCE)
+    test_X, test_y = cached_features(store, data_hash, df_test, TIME_PERIODS, STEP_DISTANCE)
 
     print(f"   Training Samples: {len(train_X)}")
     print(f"   Testing Samples:  {len(test_X)}")
@@ -1,5 +1,6 @@
 import os
 from collections import defaultdict
+from multiprocessing.pool import ThreadPool
 
 import numpy as np
 from scipy.io.wavfile import read, write
@@ -29,10 +30,14 @@ SECS_PER_NUMBER = 3
 
 LABELS = generate_number_sequence()
 
+# Digits trimmed and written at the same time
+N_WRITE_THREADS = 4
+
 
 def split_wav(start_offset, secs_between_numbers, secs_per_number):
     fname = PATH_TO_AUDIO_FILE
-    rate, sound = read(fname)
+    # Memory-mapped, only the samples of the digit being written are read
+    rate, sound = read(fname, mmap=True)
 
     if len(sound.shape) > 1:
         # Audio probably has L and R channels.
@@ -44,6 +49,8 @@ def split_wav(start_offset, secs_between_numbers, secs_per_number):
 
     counts = defaultdict(lambda: 0)
 
+    # Cut every digit first, then trim and write them on a thread pool
+    digits = []
     for i, label in enumerate(LABELS):
         label = str(label)
         start_idx = offset_idx + i * samples_between_numbers
@@ -52,19 +59,27 @@ def split_wav(start_offset, secs_between_numbers, secs_per_number):
         if stop_idx > len(sound):
             raise('Error: Sound ends before expected number of samples reached for index:' + str(i))
 
-        # trim silence
         digit_audio = sound[start_idx:stop_idx]
-        digit_audio_trimmed = trim_silence(digit_audio)
 
         # Build filename
         outfile = label + "_" + YOUR_NAME_HERE + "_" + str(counts[label]) + ".wav"
         outfile = 'recordings' + os.sep + outfile
-
-        # Write audio chunk to file
-        print "writing", outfile
-        write(outfile, rate, digit_audio_trimmed)
+        digits.append((outfile, digit_audio))
         counts[label] += 1
 
+    pool = ThreadPool(N_WRITE_THREADS)
+    pool.map(lambda digit: trim_and_write(digit[0], rate, digit[1]), digits)
+    pool.close()
+    pool.join()
+
+
+def trim_and_write(outfile, rate, digit_audio):
+    # trim silence
+    digit_audio_trimmed = trim_silence(digit_audio)
+
+    # Write audio chunk to file
+    print "writing", outfile
+    write(outfile, rate, digit_audio_trimmed)
 
 
 def trim_silence(audio, n_noise_samples=1000, noise_factor=1.0, mean_filter_size=100):
@@ -82,19 +97,18 @@ def trim_silence(audio, n_noise_samples=1000, noise_factor=1.0, mean_filter_size
     noise_sample_period = mag[end-n_noise_samples:end]
     noise_threshold = noise_sample_period.max()*noise_factor
 
-    mag_mean = np.convolve(mag, [1/float(mean_filter_size)]*mean_filter_size, 'same')
-
-    # find onset
-    for idx, point in enumerate(mag_mean):
-        if point > noise_threshold:
-            start = idx
-            break
-
-    # Reverse the array for trimming the end
-    for idx, point in enumerate(mag_mean[::-1]):
-        if point > noise_threshold:
-            end = len(audio) - idx
-            break
+    # Moving average from a cumulative sum, centred like np.convolve(mag, kernel, 'same')
+    mag_sum = np.concatenate(([0.], np.cumsum(mag, dtype=np.float64)))
+    window_end = np.arange(len(audio)) + (mean_filter_size - 1) // 2 + 1
+    window_start = np.maximum(window_end - mean_filter_size, 0)
+    window_end = np.minimum(window_end, len(audio))
+    mag_mean = (mag_sum[window_end] - mag_sum[window_start]) / float(mean_filter_size)
+
+    above = mag_mean > noise_threshold
+    if above.any():
+        # find onset, and the end from the reversed array
+        start = np.argmax(above)
+        end = len(audio) - np.argmax(above[::-1])
 
     return audio[start:end]
 
@@ -0,0 +1,40 @@
+import os
+import time
+import numpy as np
+import scipy.signal as sig
+
+from mfcc_func import create_mfcc_features
+
+# Float vs CMSIS-DSP fixed-point (Q31/Q15) MFCCs on the FSDD recordings:
+# extraction throughput and feature error against arm_mfcc_f32. q31_scaled is the
+# opt-in q31 variant that is not firmware-identical
+PRECISIONS = ["float", "q31", "q15", "q31_scaled"]
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+FSDD_PATH = os.path.join(PROJECT_ROOT, "recordings")
+
+recordings_list = sorted(os.path.join(FSDD_PATH, rec_path) for rec_path in os.listdir(FSDD_PATH))
+
+FFTSize = 1024
+sample_rate = 8000
+numOfMelFilters = 20
+numOfDctOutputs = 13
+window = sig.get_window("hamming", FFTSize)
+
+reference = None
+for precision in PRECISIONS:
+    start = time.perf_counter()
+    mfcc_features, labels = create_mfcc_features(
+        recordings_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window, precision=precision
+    )
+    elapsed = time.perf_counter() - start
+    if reference is None:
+        reference = mfcc_features
+    error = np.abs(mfcc_features - reference)
+    # Worst coefficient of every file
+    file_error = error.max(axis=1)
+
+    print(f"{precision:>10}: {len(labels) / elapsed:8.0f} files/s ({elapsed / len(labels) * 1e3:.3f} ms/file), "
+          f"max abs error {error.max():.2e}, per file median {np.median(file_error):.2e} "
+          f"p99 {np.percentile(file_error, 99):.2e}")
+    print(f"            per coefficient: {np.array2string(error.max(axis=0)[:numOfDctOutputs], precision=1)}")
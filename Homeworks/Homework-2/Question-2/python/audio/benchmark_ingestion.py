@@ -0,0 +1,66 @@
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from scipy.io import wavfile
+
+from mfcc_func import _load_recording
+
+# Per-file wall time and peak transient memory of reading and normalizing the
+# first 2 * FFTSize samples of a recording: the former read/astype/np.pad/max(abs())
+# ingestion against _load_recording with a reused buffer, on the FSDD recordings
+# and on long synthetic recordings, where only _load_recording memory-maps the file
+FFTSize = 1024
+LONG_SECONDS = 600
+NUM_LONG = 5
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+FSDD_PATH = os.path.join(PROJECT_ROOT, "recordings")
+
+def load_before(wav_path, FFTSize):
+    _, sample = wavfile.read(wav_path)
+    sample = sample.astype(np.float32)[:2 * FFTSize]
+    if len(sample) < 2 * FFTSize:
+        sample = np.pad(sample, (0, 2 * FFTSize - len(sample)), "constant", constant_values= 0)
+    return sample / max(abs(sample))
+
+def load_after(wav_path, FFTSize, buffer=np.empty(2 * FFTSize, np.float32)):
+    return _load_recording(wav_path, FFTSize, buffer)[0]
+
+def measure(load, recordings_list):
+    # Wall time without tracing, then the peak memory of every file with it
+    load(recordings_list[0], FFTSize)
+    start = time.perf_counter()
+    for wav_path in recordings_list:
+        load(wav_path, FFTSize)
+    elapsed = time.perf_counter() - start
+
+    peaks = []
+    tracemalloc.start()
+    for wav_path in recordings_list:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        load(wav_path, FFTSize)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    return elapsed / len(recordings_list), np.mean(peaks)
+
+fsdd_list = sorted(os.path.join(FSDD_PATH, rec_path) for rec_path in os.listdir(FSDD_PATH))
+
+with tempfile.TemporaryDirectory() as long_dir:
+    rng = np.random.default_rng(0)
+    long_list = []
+    for idx in range(NUM_LONG):
+        long_path = os.path.join(long_dir, f"0_long_{idx}.wav")
+        wavfile.write(long_path, 8000, rng.integers(-2 ** 15, 2 ** 15, 8000 * LONG_SECONDS, dtype=np.int16))
+        long_list.append(long_path)
+
+    for name, recordings_list in [("fsdd", fsdd_list), (f"{LONG_SECONDS} s", long_list)]:
+        ok = all(np.array_equal(load_before(wav_path, FFTSize), load_after(wav_path, FFTSize))
+                 for wav_path in recordings_list)
+        before_time, before_peak = measure(load_before, recordings_list)
+        after_time, after_peak = measure(load_after, recordings_list)
+        print(f"{name:>6} ({len(recordings_list)} files): before {before_time * 1e6:8.1f} us/file "
+              f"{before_peak / 1024:8.1f} KiB/file, after {after_time * 1e6:8.1f} us/file "
+              f"{after_peak / 1024:8.1f} KiB/file, identical: {ok}")
@@ -15,11 +15,12 @@ PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 FSDD_PATH = os.path.join(PROJECT_ROOT, "recordings")
 
 # MFCC function folder
-from mfcc_func import create_mfcc_features
+from mfcc_func import MfccStore, cached_mfcc_features
 
 # Output folders (created automatically)
 CLASSIFICATION_MODEL_DIR = os.path.join(PROJECT_ROOT, "models")
 CLASSIFICATION_EXPORT_DIR = os.path.join(PROJECT_ROOT, "export")
+MFCC_STORE_DIR = os.path.join(PROJECT_ROOT, "mfcc_cache")
 
 os.makedirs(CLASSIFICATION_MODEL_DIR, exist_ok=True)
 os.makedirs(CLASSIFICATION_EXPORT_DIR, exist_ok=True)
@@ -42,13 +43,11 @@ window = sig.get_window("hamming", FFTSize)
 test_list = {record for record in recordings_list if "yweweler" in os.path.basename(record)}
 train_list = set(recordings_list) - test_list
 
-train_mfcc_features, train_labels = create_mfcc_features(
-    train_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window
-)
+# MFCCs are reused from the feature store, only new or changed recordings are extracted
+store = MfccStore(MFCC_STORE_DIR, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
+train_mfcc_features, train_labels = cached_mfcc_features(store, train_list)
 
-test_mfcc_features, test_labels = create_mfcc_features(
-    test_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window
-)
+test_mfcc_features, test_labels = cached_mfcc_features(store, test_list)
 
 knn = sklearn2c.KNNClassifier(n_neighbors=3)
 knn.train(train_mfcc_features, train_labels, model_save_path)
@@ -1,26 +1,160 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
 import numpy as np
+from scipy import fft
 from scipy.io import wavfile
 import cmsisdsp as dsp
 import cmsisdsp.mfcc as mfcc
-from cmsisdsp.datatype import F32
+from cmsisdsp.datatype import F32, Q15, Q31
 
-def create_mfcc_features(recordings_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window):
+# MFCC instance of a worker process, created once by _init_worker
+_worker_mfcc = None
+
+# Frames per batch_mfcc matrix operation, bounds the memory of the spectra
+BATCH_FRAMES = 4096
+
+# Mel filter/DCT matrices and initialised MFCC instances are built once per parameter set.
+# Set MATRIX_CACHE_DIR to also keep the matrices on disk, shared across processes and runs
+MATRIX_CACHE_DIR = None
+_matrix_cache = {}
+_instance_cache = {}
+
+# WAV files larger than this are memory-mapped, so only the 2 * FFTSize samples used
+# are read. Short recordings like FSDD's are cheaper to read outright
+MMAP_MIN_BYTES = 64 * 1024
+
+# Constants of CMSIS-DSP's arm_mfcc_q31: ln(2) in Q5.26, the offset every mel energy gets
+# before the log, and the headroom shift of the mel filter sums
+LOG2TOLOG_Q31 = 0x02C5C860
+MICRO_Q31 = 0x08637BD0
+SHIFT_MELFILTER_SATURATION_Q31 = 10
+
+class _MfccInstanceQ31Scaled:
+    """
+    What _mfcc_init_q31_scaled keeps for _mfcc_q31_scaled, like arm_mfcc_instance_q31.
+    """
+
+def _mfcc_init_q31_scaled(mfcc_instance, FFTSize, numOfMelFilters, numOfDctOutputs, dctCoefs, filterPos,
+                   filterLengths, filterCoefs, windowCoefs):
+    # Same arguments as arm_mfcc_init_q31
+    mfcc_instance.fftLen = FFTSize
+    mfcc_instance.dct = np.asarray(dctCoefs).reshape(numOfDctOutputs, numOfMelFilters)
+    ends = np.cumsum(filterLengths)
+    mfcc_instance.filters = [(pos, pos + length, filterCoefs[end - length:end])
+                             for pos, length, end in zip(filterPos, filterLengths, ends)]
+    mfcc_instance.window = windowCoefs
+    mfcc_instance.rfft = dsp.arm_rfft_instance_q31()
+    return dsp.arm_rfft_init_q31(mfcc_instance.rfft, FFTSize, 0, 1)
+
+def _mfcc_q31_scaled(mfcc_instance, frame, tmp):
+    """
+    Q8.23 MFCCs of a q31 frame, returned as (status, mfcc) like arm_mfcc_q31,
+    whose CMSIS-DSP kernels it runs in the same order, for precision="q31_scaled".
+
+    arm_cmplx_mag_q31 returns 0 for components below 2^17 (2^-14 of full
+    scale, coarser than one Q15 step). After the 1/FFTSize scaling of
+    arm_rfft_q31 the quiet mel bands of loud frames fall under it, which
+    makes arm_mfcc_q31 less accurate than arm_mfcc_q15. Here the spectrum
+    is shifted left by its block exponent before arm_cmplx_mag_q31 and the
+    shift is taken back out of the logs. tmp (int32, at least
+    numOfMelFilters long) holds the mel energies.
+
+    This is NOT what the firmware computes: the results differ from
+    arm_mfcc_q31 (by up to about 2 on FSDD). Use precision="q31" for
+    features that match the device.
+    """
+    # Normalized to full scale, the log of the gain is taken back out of the logs too
+    log_gain = 0
+    peak, _ = dsp.arm_absmax_q31(frame)
+    if peak != 0:
+        _, quotient, shift = dsp.arm_divide_q31(0x7FFFFFFF, peak)
+        frame = dsp.arm_scale_q31(frame, quotient, shift)
+        log_gain = int(dsp.arm_vlog_q31(np.array([quotient], np.int32))[0]) + shift * LOG2TOLOG_Q31
+    windowed = dsp.arm_mult_q31(frame, mfcc_instance.window)
+    spectrum = dsp.arm_rfft_q31(mfcc_instance.rfft, windowed)[:mfcc_instance.fftLen + 2]
+
+    # Block exponent: the left shift that brings the largest component just under
+    # full scale (frexp's exponent is the bit length of the integer)
+    spectrum_shift = 31 - np.frexp(max(np.abs(spectrum.astype(np.int64)).max(), 1))[1]
+    magnitudes = dsp.arm_cmplx_mag_q31(dsp.arm_shift_q31(spectrum, int(spectrum_shift)))
+
+    # Mel energies, Q16.48 dot products brought down to Q16.29 minus the headroom
+    mel = tmp[:len(mfcc_instance.filters)]
+    for mel_idx, (start, stop, coefs) in enumerate(mfcc_instance.filters):
+        energy = int(dsp.arm_dot_prod_q31(magnitudes[start:stop], coefs)) + MICRO_Q31
+        mel[mel_idx] = min(energy >> (SHIFT_MELFILTER_SATURATION_Q31 + 18), 0x7FFFFFFF)
+
+    # Q5.26 logs, corrected for the FFT, mel and normalization scaling, then Q8.23
+    log_exponent = mfcc_instance.fftLen.bit_length() + 1 + SHIFT_MELFILTER_SATURATION_Q31 - spectrum_shift
+    logs = dsp.arm_offset_q31(dsp.arm_vlog_q31(mel), int(log_exponent * LOG2TOLOG_Q31 - log_gain))
+    return 0, dsp.arm_mat_vec_mult_q31(mfcc_instance.dct, dsp.arm_shift_q31(logs, -3))
+
+# CMSIS matrix datatype, MFCC instance/init/compute functions and float-to-fixed conversion
+# of every create_mfcc_features precision. Fixed-point MFCCs come out in Q8.23 (q31) or
+# Q8.7 (q15) and are scaled back to float by the last entry. q31_scaled is an opt-in,
+# more accurate q31 variant that matches no firmware, see _mfcc_q31_scaled
+_PRECISIONS = {
+    "float": (F32, dsp.arm_mfcc_instance_f32, dsp.arm_mfcc_init_f32, dsp.arm_mfcc_f32, None, 1.0),
+    "q31": (Q31, dsp.arm_mfcc_instance_q31, dsp.arm_mfcc_init_q31, dsp.arm_mfcc_q31, dsp.arm_float_to_q31,
+            2.0 ** -23),
+    "q31_scaled": (Q31, _MfccInstanceQ31Scaled, _mfcc_init_q31_scaled, _mfcc_q31_scaled, dsp.arm_float_to_q31,
+                   2.0 ** -23),
+    "q15": (Q15, dsp.arm_mfcc_instance_q15, dsp.arm_mfcc_init_q15, dsp.arm_mfcc_q15, dsp.arm_float_to_q15,
+            2.0 ** -7),
+}
+
+def _mfcc_matrices(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, precision="float"):
+    key = (FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, precision)
+    if key in _matrix_cache:
+        return _matrix_cache[key]
+    matrix_path = None
+    if MATRIX_CACHE_DIR is not None:
+        matrix_path = os.path.join(MATRIX_CACHE_DIR, "mfcc_matrices_{}_{}_{}_{}_{}.npz".format(*key))
+        try:
+            with np.load(matrix_path) as cached:
+                _matrix_cache[key] = (cached["filtLen"].tolist(), cached["filtPos"].tolist(),
+                                      cached["packedFilters"], cached["dctMatrixFilters"])
+            return _matrix_cache[key]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    dtype = _PRECISIONS[precision][0]
     freq_min = 20
     freq_high = sample_rate / 2
     filtLen, filtPos, packedFilters = mfcc.melFilterMatrix(
-        F32, freq_min, freq_high, numOfMelFilters, sample_rate, FFTSize
+        dtype, freq_min, freq_high, numOfMelFilters, sample_rate, FFTSize
     )
 
-    dctMatrixFilters = mfcc.dctMatrix(F32, numOfDctOutputs, numOfMelFilters)
-    num_samples = len(recordings_list)
-    mfcc_features = np.empty((num_samples, numOfDctOutputs * 2), np.float32)
-    labels = np.empty(num_samples, dtype = int)
+    dctMatrixFilters = mfcc.dctMatrix(dtype, numOfDctOutputs, numOfMelFilters)
+    _matrix_cache[key] = (filtLen, filtPos, packedFilters, dctMatrixFilters)
+    if matrix_path is not None:
+        os.makedirs(MATRIX_CACHE_DIR, exist_ok=True)
+        tmp_path = matrix_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, filtLen=filtLen, filtPos=filtPos, packedFilters=packedFilters,
+                     dctMatrixFilters=dctMatrixFilters)
+        os.replace(tmp_path, matrix_path)
+    return _matrix_cache[key]
 
-    mfccf32 = dsp.arm_mfcc_instance_f32()
+def _mfcc_instance(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window, precision="float"):
+    # Instances only read their matrices, so one per parameter set, window and precision is shared
+    window = np.asarray(window, np.float32)
+    key = (FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, hashlib.sha1(window.tobytes()).hexdigest(),
+           precision)
+    if key in _instance_cache:
+        return _instance_cache[key]
+    filtLen, filtPos, packedFilters, dctMatrixFilters = _mfcc_matrices(
+        FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, precision
+    )
+    _, new_instance, init_mfcc, _, to_fixed, _ = _PRECISIONS[precision]
+    mfcc_instance = new_instance()
 
-    status = dsp.arm_mfcc_init_f32(
-        mfccf32,
+    status = init_mfcc(
+        mfcc_instance,
         FFTSize,
         numOfMelFilters,
         numOfDctOutputs,
@@ -28,25 +162,333 @@ def create_mfcc_features(recordings_list, FFTSize, sample_rate, numOfMelFilters,
         filtPos,
         filtLen,
         packedFilters,
-        window,
+        window if to_fixed is None else to_fixed(window),
     )
+    _instance_cache[key] = mfcc_instance
+    return mfcc_instance
+
+def _load_recording(wav_path, FFTSize, out=None):
+    # First 2 * FFTSize samples, zero-padded and normalized in place in out
+    # (a float32 buffer reused across files, allocated if None)
+    wav_file = os.path.basename(wav_path)
+    file_specs = wav_file.split(".")[0]
+    digit, person, recording = file_specs.split("_")
+    _, data = wavfile.read(wav_path, mmap=os.path.getsize(wav_path) > MMAP_MIN_BYTES)
+    if out is None:
+        out = np.empty(2 * FFTSize, np.float32)
+    num_read = min(len(data), 2 * FFTSize)
+    out[:num_read] = data[:num_read]
+    out[num_read:] = 0
+    # An all-silent file stays zero instead of becoming NaN
+    max_val = max(out.max(), -out.min())
+    if max_val > 0:
+        out /= max_val
+    return out, int(digit)
+
+def _frame_mfcc(mfcc_instance, frame, tmp, precision):
+    if precision == "float":
+        return dsp.arm_mfcc_f32(mfcc_instance, frame, tmp)
+    _, _, _, compute_mfcc, to_fixed, out_scale = _PRECISIONS[precision]
+    _, fixed_mfcc = compute_mfcc(mfcc_instance, to_fixed(frame), tmp)
+    return fixed_mfcc * out_scale
+
+def _mfcc_buffers(FFTSize, precision):
+    # Sample and scratch buffers of _recording_mfcc, allocated once per loop over the files.
+    # The fixed-point MFCCs need a q31 scratch buffer of 2 * FFTSize
+    sample = np.empty(2 * FFTSize, np.float32)
+    tmp = np.zeros(FFTSize + 2, np.float32) if precision == "float" else np.zeros(2 * FFTSize, np.int32)
+    return sample, tmp
+
+def _recording_mfcc(mfcc_instance, wav_path, FFTSize, precision="float", buffers=None):
+    sample, tmp = buffers if buffers is not None else _mfcc_buffers(FFTSize, precision)
+    sample, digit = _load_recording(wav_path, FFTSize, sample)
+    first_half = sample[:FFTSize]
+    second_half = sample[FFTSize:2*FFTSize]
+    first_half_mfcc = _frame_mfcc(mfcc_instance, first_half, tmp, precision)
+    second_half_mfcc = _frame_mfcc(mfcc_instance, second_half, tmp, precision)
+    return np.concatenate((first_half_mfcc, second_half_mfcc)), digit
+
+def batch_mfcc(frames, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window):
+    """
+    MFCCs of a (n_frames, FFTSize) matrix of frames as whole-matrix operations,
+    with the mel filters and DCT matrix arm_mfcc_f32 is initialised with.
+
+    Follows arm_mfcc_f32: window, rfft magnitude, mel filterbank, log(x + 1e-6)
+    and DCT. The packed mel filters are unpacked into a dense
+    (numOfMelFilters, FFTSize // 2 + 1) matrix, so the filterbank and the DCT
+    are two matmuls. The FFTs run in single precision with scipy's pocketfft,
+    threaded over the frames. arm_mfcc_f32 also scales every frame by its
+    maximum before the FFT and back after it, which cancels out and is
+    skipped here.
+    Returns a float32 (n_frames, numOfDctOutputs) matrix.
+    """
+    filtLen, filtPos, packedFilters, dctMatrixFilters = _mfcc_matrices(
+        FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs
+    )
+    mel_filters = np.zeros((numOfMelFilters, FFTSize // 2 + 1), np.float32)
+    offsets = np.cumsum(filtLen) - filtLen
+    for i, (pos, length, offset) in enumerate(zip(filtPos, filtLen, offsets)):
+        mel_filters[i, pos:pos + length] = packedFilters[offset:offset + length]
+    dct = np.asarray(dctMatrixFilters, np.float32).reshape(numOfDctOutputs, numOfMelFilters)
+    window = np.asarray(window, np.float32)
+
+    frames = np.asarray(frames, np.float32)
+    mfcc_features = np.empty((len(frames), numOfDctOutputs), np.float32)
+    for first in range(0, len(frames), BATCH_FRAMES):
+        spectrum = np.abs(fft.rfft(frames[first:first + BATCH_FRAMES] * window, axis=1, workers=-1))
+        mel_energies = np.log(spectrum @ mel_filters.T + 1e-6)
+        mfcc_features[first:first + BATCH_FRAMES] = mel_energies @ dct.T
+    return mfcc_features
+
+# Samples read from a WAV file per step of stream_mfcc
+STREAM_BLOCK = 4096
+
+def _wav_blocks(wav_path, block_size):
+    # The file is memory-mapped, so only the block being read is paged in
+    _, data = wavfile.read(wav_path, mmap=True)
+    scale = 1.0
+    if np.issubdtype(data.dtype, np.integer):
+        # Integer PCM to [-1, 1)
+        scale = 1.0 / (np.iinfo(data.dtype).max + 1)
+    for first in range(0, len(data), block_size):
+        yield np.asarray(data[first:first + block_size], np.float32) * scale
+
+def stream_mfcc(source, FFTSize, hop, sample_rate, numOfMelFilters, numOfDctOutputs, window,
+                pad_end=True, block_size=STREAM_BLOCK):
+    """
+    Yields the arm_mfcc_f32 MFCCs of every FFTSize frame, hop samples apart,
+    of a WAV file path or of an iterable of sample blocks (e.g. a live stream).
+
+    Only the current frame and one block are held at a time, so memory stays
+    constant however long the recording is. Integer WAV samples are scaled
+    to [-1, 1) instead of by the file maximum, which would need the whole
+    file first. With pad_end, trailing samples that no full frame covers go
+    into one last zero-padded frame.
+    """
+    blocks = _wav_blocks(source, block_size) if isinstance(source, str) else source
+    mfccf32 = _mfcc_instance(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
+    tmp = np.zeros(FFTSize + 2, dtype=np.float32)
+
+    pending = np.empty(0, dtype=np.float32)
+    skip = 0
+    covered = 0
+    for block in blocks:
+        block = np.asarray(block, dtype=np.float32)
+        # hop > FFTSize drops the samples between frames
+        dropped = min(skip, len(block))
+        skip -= dropped
+        pending = np.concatenate((pending, block[dropped:]))
+        while len(pending) >= FFTSize:
+            yield dsp.arm_mfcc_f32(mfccf32, pending[:FFTSize], tmp)
+            skip = max(hop - len(pending), 0)
+            pending = pending[hop:]
+            covered = max(FFTSize - hop, 0)
+
+    if pad_end and len(pending) > covered:
+        frame = np.zeros(FFTSize, dtype=np.float32)
+        frame[:len(pending)] = pending
+        yield dsp.arm_mfcc_f32(mfccf32, frame, tmp)
+
+def mfcc_sequences(recordings_list, FFTSize, hop, sample_rate, numOfMelFilters, numOfDctOutputs, window,
+                   pad=False):
+    """
+    MFCC sequences of whole recordings for temporal models, see stream_mfcc.
+
+    Returns (sequences, frame_counts, labels). sequences is a list of
+    (n_frames, numOfDctOutputs) arrays, or with pad a zero-padded float32
+    (n_files, max_frames, numOfDctOutputs) array.
+    """
+    recordings_list = list(recordings_list)
+    sequences = []
+    for wav_path in recordings_list:
+        frames = list(stream_mfcc(wav_path, FFTSize, hop, sample_rate, numOfMelFilters, numOfDctOutputs, window))
+        sequences.append(np.array(frames, dtype=np.float32).reshape(-1, numOfDctOutputs))
+    frame_counts = np.array([len(sequence) for sequence in sequences], dtype=int)
+    labels = np.array([_recording_label(wav_path) for wav_path in recordings_list], dtype = int)
+    if not pad:
+        return sequences, frame_counts, labels
+
+    padded = np.zeros((len(sequences), frame_counts.max(initial=0), numOfDctOutputs), dtype=np.float32)
+    for sample_idx, sequence in enumerate(sequences):
+        padded[sample_idx, :len(sequence)] = sequence
+    return padded, frame_counts, labels
+
+def _init_worker(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window, precision):
+    global _worker_mfcc
+    _worker_mfcc = _mfcc_instance(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window, precision)
+
+def _mfcc_chunk(shm_name, shape, first, wav_paths, FFTSize, precision):
+    # Runs in a worker process, features are written straight into the shared result array
+    shm = shared_memory.SharedMemory(name=shm_name)
+    mfcc_features = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+    labels = []
+    buffers = _mfcc_buffers(FFTSize, precision)
+    try:
+        for sample_idx, wav_path in enumerate(wav_paths, first):
+            mfcc_features[sample_idx], digit = _recording_mfcc(_worker_mfcc, wav_path, FFTSize, precision, buffers)
+            labels.append(digit)
+        return labels
+    finally:
+        del mfcc_features
+        shm.close()
+
+def create_mfcc_features(recordings_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window,
+                         n_jobs=1, backend="cmsis", precision="float"):
+    # backend="numpy" computes every frame of every file at once with batch_mfcc instead of
+    # two arm_mfcc_f32 calls per file, n_jobs other than 1 splits the files into chunks for
+    # worker processes (None or -1: every core), each worker sets up its CMSIS MFCC instance once.
+    # precision="q31"/"q15" runs the fixed-point arm_mfcc_q31/q15 of the firmware instead, with
+    # quantized mel/DCT matrices and window, and scales its MFCCs back to float
+    # precision="q31_scaled" is a more accurate q31 that is not firmware-identical (_mfcc_q31_scaled)
+    num_samples = len(recordings_list)
+    shape = (num_samples, numOfDctOutputs * 2)
+    if backend not in ("cmsis", "numpy"):
+        raise ValueError(f"Unknown backend {backend!r}, expected 'cmsis' or 'numpy'")
+    if precision not in _PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}, expected 'float', 'q31', 'q15' or 'q31_scaled'")
+    if backend == "numpy" and precision != "float":
+        raise ValueError("The numpy backend only computes float MFCCs")
+    if backend == "numpy":
+        samples = np.empty((num_samples, 2 * FFTSize), np.float32)
+        labels = np.empty(num_samples, dtype = int)
+        for sample_idx, wav_path in enumerate(recordings_list):
+            # Read straight into the file's row
+            _, labels[sample_idx] = _load_recording(wav_path, FFTSize, samples[sample_idx])
+        # Both frames of a file are consecutive rows, so the MFCCs reshape back per file
+        frames = samples.reshape(-1, FFTSize)
+        mfcc_features = batch_mfcc(frames, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
+        return mfcc_features.reshape(shape), labels
+    if n_jobs == 1 or num_samples == 0:
+        mfcc_features = np.empty(shape, np.float32)
+        labels = np.empty(num_samples, dtype = int)
+        mfcc_instance = _mfcc_instance(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window, precision)
+        buffers = _mfcc_buffers(FFTSize, precision)
+        for sample_idx, wav_path in enumerate(recordings_list):
+            mfcc_features[sample_idx], labels[sample_idx] = _recording_mfcc(mfcc_instance, wav_path, FFTSize,
+                                                                            precision, buffers)
+        return mfcc_features, labels
+
+    if n_jobs is None or n_jobs == -1:
+        n_jobs = os.cpu_count()
+    # A few chunks per worker keeps them busy when some files take longer
+    # (callers may pass a set, chunks need a sequence)
+    recordings_list = list(recordings_list)
+    chunk_size = -(-num_samples // (n_jobs * 4))
+    firsts = list(range(0, num_samples, chunk_size))
+    chunks = [recordings_list[first:first + chunk_size] for first in firsts]
+
+    shm = shared_memory.SharedMemory(create=True, size=np.dtype(np.float32).itemsize * shape[0] * shape[1])
+    try:
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(chunks)), initializer=_init_worker,
+                                 initargs=(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs,
+                                           window, precision)) as pool:
+            labels = np.concatenate(list(pool.map(_mfcc_chunk, repeat(shm.name), repeat(shape),
+                                                  firsts, chunks, repeat(FFTSize), repeat(precision))))
+        mfcc_features = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return mfcc_features, labels.astype(int)
+
+def _recording_label(wav_path):
+    # "0_jackson_0.wav" -> 0
+    return int(os.path.basename(wav_path).split(".")[0].split("_")[0])
+
+class MfccStore:
+    """
+    On-disk MFCC features, one row per recording, for one set of MFCC
+    parameters (FFTSize, sample_rate, mel and DCT counts and the window)
+    and one backend and precision of create_mfcc_features.
+
+    Rows are keyed by the SHA-1 of the WAV file contents, so an edited
+    recording misses the store while a renamed or copied one still hits.
+    Every parameter set gets its own directory with an append-only float32
+    row file and a JSON index. The row file is memory-mapped, so a lookup
+    only reads the rows it asks for. File hashes are remembered per path,
+    size and mtime and only recomputed when a file changed.
+    """
+
+    def __init__(self, store_dir, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window,
+                 backend="cmsis", precision="float"):
+        self.params = (FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
+        self.backend = backend
+        self.precision = precision
+        self.num_features = numOfDctOutputs * 2
+        window_hash = hashlib.sha1(np.asarray(window, np.float64).tobytes()).hexdigest()
+        params_key = json.dumps([FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window_hash,
+                                 backend, precision])
+        self.entry_dir = os.path.join(store_dir, hashlib.sha1(params_key.encode()).hexdigest())
+        self.rows_path = os.path.join(self.entry_dir, "features.f32")
+        self.index_path = os.path.join(self.entry_dir, "index.json")
+        os.makedirs(self.entry_dir, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {"rows": {}, "files": {}}
+        self.files_changed = False
+
+    def file_hash(self, wav_path):
+        stat = os.stat(wav_path)
+        path = os.path.abspath(wav_path)
+        known = self.index["files"].get(path)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+        with open(wav_path, "rb") as f:
+            sha1 = hashlib.sha1(f.read()).hexdigest()
+        self.index["files"][path] = [stat.st_size, stat.st_mtime_ns, sha1]
+        self.files_changed = True
+        return sha1
+
+    def lookup(self, hashes):
+        # Row of every hash, -1 where the store has none
+        return np.array([self.index["rows"].get(h, -1) for h in hashes], dtype=np.int64)
+
+    def features(self, rows):
+        if len(rows) == 0 or not os.path.exists(self.rows_path):
+            return np.empty((len(rows), self.num_features), np.float32)
+        stored = np.memmap(self.rows_path, dtype=np.float32, mode="r").reshape(-1, self.num_features)
+        return np.asarray(stored[rows])
+
+    def add(self, hashes, mfcc_features):
+        # Rows are appended before the index points at them, a crash only leaves unused rows
+        first = os.path.getsize(self.rows_path) // (4 * self.num_features) if os.path.exists(self.rows_path) else 0
+        with open(self.rows_path, "ab") as f:
+            f.write(np.ascontiguousarray(mfcc_features, np.float32).tobytes())
+        for row, h in enumerate(hashes, first):
+            self.index["rows"][h] = row
+        self.save_index()
+
+    def save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+        self.files_changed = False
+
+def cached_mfcc_features(store, recordings_list, n_jobs=1):
+    """
+    create_mfcc_features through an MfccStore: only recordings the store has
+    no row for are extracted (and added), every other row is read from disk.
+    Extraction uses the backend and precision of the store.
+    """
+    recordings_list = list(recordings_list)
+    hashes = [store.file_hash(wav_path) for wav_path in recordings_list]
+    rows = store.lookup(hashes)
+
+    # Identical recordings only need to be extracted once
+    missing = {}
+    for sample_idx in np.flatnonzero(rows < 0):
+        missing.setdefault(hashes[sample_idx], recordings_list[sample_idx])
+    if missing:
+        mfcc_features, _ = create_mfcc_features(list(missing.values()), *store.params,
+                                                n_jobs=n_jobs, backend=store.backend,
+                                                precision=store.precision)
+        store.add(list(missing), mfcc_features)
+        rows = store.lookup(hashes)
+    elif store.files_changed:
+        store.save_index()
 
-    for sample_idx, wav_path in enumerate(recordings_list):
-        wav_file = os.path.basename(wav_path)
-        file_specs = wav_file.split(".")[0]
-        digit, person, recording = file_specs.split("_")
-        _, sample = wavfile.read(wav_path)
-        sample = sample.astype(np.float32)[:2 * FFTSize]
-        if len(sample < 2 * FFTSize):
-            sample = np.pad(sample, (0, 2 * FFTSize - len(sample)), "constant", constant_values= 0)
-        sample = sample / max(abs(sample))
-        first_half = sample[:FFTSize]
-        second_half = sample[FFTSize:2*FFTSize]
-        tmp = np.zeros(FFTSize + 2)
-        first_half_mfcc = dsp.arm_mfcc_f32(mfccf32, first_half, tmp)
-        second_half_mfcc = dsp.arm_mfcc_f32(mfccf32, second_half, tmp)
-        mfcc_feature = np.concatenate((first_half_mfcc, second_half_mfcc))
-        mfcc_features[sample_idx] = mfcc_feature
-        labels[sample_idx] = int(digit)
-        
-    return mfcc_features, labels
\ No newline at end of file
+    labels = np.array([_recording_label(wav_path) for wav_path in recordings_list], dtype = int)
+    return store.features(rows), labels
@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+import numpy as np
+import scipy.signal as sig
+
+from mfcc_func import create_mfcc_features
+
+# Checks the NumPy batch MFCC backend against the cmsisdsp arm_mfcc_f32 output
+# on the FSDD recordings, exits with status 1 if they disagree
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+FSDD_PATH = os.path.join(PROJECT_ROOT, "recordings")
+
+# Both backends run in float32, the log of small mel energies amplifies rounding
+TOLERANCE = 1e-3
+
+recordings_list = sorted(os.path.join(FSDD_PATH, rec_path) for rec_path in os.listdir(FSDD_PATH))
+
+FFTSize = 1024
+sample_rate = 8000
+numOfMelFilters = 20
+numOfDctOutputs = 13
+window = sig.get_window("hamming", FFTSize)
+
+start = time.perf_counter()
+cmsis_features, cmsis_labels = create_mfcc_features(
+    recordings_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window
+)
+cmsis_time = time.perf_counter() - start
+
+start = time.perf_counter()
+numpy_features, numpy_labels = create_mfcc_features(
+    recordings_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window, backend="numpy"
+)
+numpy_time = time.perf_counter() - start
+
+error = np.abs(cmsis_features - numpy_features).max()
+print(f"{len(recordings_list)} recordings: cmsis {cmsis_time:.2f} s, numpy {numpy_time:.2f} s")
+print(f"Max abs MFCC difference: {error:.2e} (tolerance {TOLERANCE:.0e})")
+
+if error > TOLERANCE or not np.array_equal(cmsis_labels, numpy_labels):
+    print("Backends disagree")
+    sys.exit(1)
+print("Backends agree")
@@ -5,11 +5,12 @@ import numpy as np
 import serial
 import scipy.signal as sig
 
-from mfcc_func import create_mfcc_features  # senin modülün
+from mfcc_func import MfccStore, cached_mfcc_features  # senin modülün
 
 # ==== KLASÖR AYARLARI ====
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 FSDD_PATH = os.path.join(PROJECT_ROOT, "recordings")  # wav dosyaların burada
+MFCC_STORE_DIR = os.path.join(PROJECT_ROOT, "mfcc_cache")  # main.py ile ortak MFCC deposu
 
 # ==== MFCC PARAMETRELERİ (STM32 tarafıyla aynı) ====
 FFTSize = 1024
@@ -23,13 +24,9 @@ recordings_list = [os.path.join(FSDD_PATH, rec) for rec in os.listdir(FSDD_PATH)
 test_list  = {rec for rec in recordings_list if "yweweler" in os.path.basename(rec)}
 train_list = set(recordings_list) - test_list
 
-_, _ = create_mfcc_features(train_list, FFTSize, sample_rate,
-                            numOfMelFilters, numOfDctOutputs, window)
-test_mfcc_features, test_labels = create_mfcc_features(test_list, FFTSize,
-                                                       sample_rate,
-                                                       numOfMelFilters,
-                                                       numOfDctOutputs,
-                                                       window)
+store = MfccStore(MFCC_STORE_DIR, FFTSize, sample_rate,
+                  numOfMelFilters, numOfDctOutputs, window)
+test_mfcc_features, test_labels = cached_mfcc_features(store, test_list)
 
 test_mfcc_features = np.asarray(test_mfcc_features, dtype=np.float32)
 test_labels = np.asarray(test_labels, dtype=np.int32)
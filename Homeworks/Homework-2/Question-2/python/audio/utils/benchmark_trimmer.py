@@ -0,0 +1,87 @@
+import time
+import numpy as np
+
+from trimmer import split_multiple_recordings, trim_silence
+
+# Vectorized split_multiple_recordings/trim_silence against the former per-sample loops
+# on synthetic 8 kHz sessions: utterances separated by pauses, some shorter than
+# min_silence_duration. The loops are only timed up to LOOP_MAX_SECONDS of audio
+SAMPLE_RATE = 8000
+DURATIONS = [60, 600, 3600]
+LOOP_MAX_SECONDS = 600
+NOISE_THRESHOLD = 150
+
+def split_multiple_recordings_loop(audio, min_silence_duration=0.25, noise_threshold=150, sample_rate_hz=8e3):
+    min_silence_frame = sample_rate_hz * min_silence_duration
+    silence_zones = []
+    zone_start = None
+    zone_end = None
+    for idx, point in enumerate(audio):
+        if abs(point) < noise_threshold and zone_start is None:
+            zone_start = idx
+        if abs(point) > noise_threshold and zone_start is not None:
+            zone_end = idx
+        if zone_start is not None and zone_end and abs(point) > noise_threshold:
+            if (zone_end - zone_start) > min_silence_frame:
+                silence_zones.append((zone_start, zone_end))
+            zone_start = None
+            zone_end = None
+
+    split_recordings = []
+    for idx, zone in enumerate(silence_zones):
+        start = 0 if idx == 0 else silence_zones[idx - 1][1]
+        split_recordings.append(audio[start:zone[0]])
+    return split_recordings
+
+def trim_silence_loop(audio, noise_threshold=150):
+    start = None
+    end = None
+    for idx, point in enumerate(audio):
+        if abs(point) > noise_threshold:
+            start = idx
+            break
+    for idx, point in enumerate(audio[::-1]):
+        if abs(point) > noise_threshold:
+            end = len(audio) - idx
+            break
+    return audio[start:end]
+
+def synthetic_session(seconds, rng):
+    # Alternating pauses (0.1-1 s of low noise) and utterances (0.3-0.8 s of loud noise)
+    parts = []
+    total = 0
+    while total < seconds * SAMPLE_RATE:
+        pause = int(rng.uniform(0.1, 1.0) * SAMPLE_RATE)
+        utterance = int(rng.uniform(0.3, 0.8) * SAMPLE_RATE)
+        parts.append(rng.normal(0, 30, pause))
+        parts.append(rng.normal(0, 3000, utterance))
+        total += pause + utterance
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16)[:seconds * SAMPLE_RATE]
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+rng = np.random.default_rng(0)
+print(f"{'audio':>7} {'splits':>7} {'split loop':>11} {'split numpy':>12} {'trim loop':>10} {'trim numpy':>11} {'same':>5}")
+for seconds in DURATIONS:
+    # Leading and trailing silence, so trimming has to walk in from both ends
+    audio = np.concatenate((np.zeros(SAMPLE_RATE * 5, np.int16), synthetic_session(seconds, rng),
+                            np.zeros(SAMPLE_RATE * 5, np.int16)))
+    split_time, splits = timed(split_multiple_recordings, audio, 0.25, NOISE_THRESHOLD, SAMPLE_RATE)
+    trim_time, trimmed = timed(trim_silence, audio, NOISE_THRESHOLD)
+
+    loop_split = loop_trim = "-"
+    same = "-"
+    if seconds <= LOOP_MAX_SECONDS:
+        loop_split_time, loop_splits = timed(split_multiple_recordings_loop, audio, 0.25, NOISE_THRESHOLD,
+                                             SAMPLE_RATE)
+        loop_trim_time, loop_trimmed = timed(trim_silence_loop, audio, NOISE_THRESHOLD)
+        loop_split = f"{loop_split_time:.3f}"
+        loop_trim = f"{loop_trim_time:.3f}"
+        same = str(len(splits) == len(loop_splits)
+                   and all(np.array_equal(a, b) for a, b in zip(splits, loop_splits))
+                   and np.array_equal(trimmed, loop_trimmed))
+    print(f"{seconds:>6}s {len(splits):>7} {loop_split:>11} {split_time:>12.3f} {loop_trim:>10} "
+          f"{trim_time:>11.4f} {same:>5}")
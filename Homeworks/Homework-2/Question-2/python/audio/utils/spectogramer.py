@@ -1,9 +1,91 @@
 from __future__ import division, print_function
+import struct
+import zlib
+from multiprocessing import Pool, cpu_count
 from os import listdir
 from os.path import isfile, join
 
-from matplotlib import pyplot as plt
+import numpy as np
 import scipy.io.wavfile as wav
+import scipy.signal
+
+# Only needed for colormaps other than 'gray'/'gray_r'
+try:
+    from matplotlib import pyplot as plt
+except ImportError:
+    plt = None
+
+# FFT length of matplotlib's specgram, which the spectrograms used to be drawn with
+NFFT = 256
+
+
+def _resize_weights(source, target):
+    # (target, source) matrix that averages the source cells every target cell overlaps, weighted by the overlap
+    edges = np.arange(target + 1) * (source / target)
+    cells = np.arange(source)[None, :]
+    overlap = np.clip(np.minimum(edges[1:, None], cells + 1) - np.maximum(edges[:-1, None], cells), 0, None)
+    return overlap / overlap.sum(axis=1, keepdims=True)
+
+
+def spectrogram_image(samples, spectrogram_dimensions=(64, 64), noverlap=16, cmap='gray_r'):
+    """ Renders the spectrogram of audio samples the way matplotlib's specgram draws it, without matplotlib.
+
+    The PSD in dB of NFFT-sample Hanning-windowed segments is scaled between its minimum and maximum to
+    256 levels of the colormap, with the low frequencies at the bottom, and area-resized to the image.
+
+    :param samples: numpy array of audio data
+    :param spectrogram_dimensions: (width, height) of the image in pixels. Defaults (64,64)
+    :param noverlap: See http://docs.scipy.org/doc/scipy/reference/generated/scipy.signal.spectrogram.html
+    :param cmap: the color scheme to use for the spectrogram. Defaults to 'gray_r'
+    :return: uint8 (height, width) array for 'gray'/'gray_r', (height, width, 4) RGBA array for other colormaps
+    """
+    samples = np.asarray(samples, dtype=np.float64)
+    if samples.ndim > 1:
+        samples = samples[:, 0]
+    if len(samples) < NFFT:
+        samples = np.pad(samples, (0, NFFT - len(samples)), 'constant')
+    _, _, spec = scipy.signal.spectrogram(samples, fs=2, window=np.hanning(NFFT), nperseg=NFFT, noverlap=noverlap,
+                                          detrend=False, scaling='density', mode='psd')
+    power_db = 10 * np.log10(np.maximum(spec, np.finfo(np.float64).tiny))
+
+    width, height = spectrogram_dimensions
+    image = _resize_weights(power_db.shape[0], height).dot(power_db[::-1]).dot(
+        _resize_weights(power_db.shape[1], width).T)
+
+    # Colormap index of every pixel, from the range of the spectrogram
+    low, high = power_db.min(), power_db.max()
+    scaled = (image - low) / (high - low) if high > low else np.zeros_like(image)
+    levels = np.clip((scaled * 256).astype(np.int64), 0, 255).astype(np.uint8)
+    if cmap == 'gray':
+        return levels
+    if cmap == 'gray_r':
+        return 255 - levels
+    if plt is None:
+        raise ImportError('matplotlib is needed for the colormap ' + repr(cmap))
+    return (plt.get_cmap(cmap)(levels) * 255).round().astype(np.uint8)
+
+
+def write_png(save_path, image):
+    """ Writes a uint8 grayscale (height, width) or RGBA (height, width, 4) image as a PNG file.
+
+    :param save_path: path of the PNG file
+    :param image: uint8 numpy array
+    :return:
+    """
+    height, width = image.shape[:2]
+    color_type = 0 if image.ndim == 2 else 6
+    # Every row starts with filter type 0 (none)
+    rows = np.zeros((height, 1 + image[0].size), dtype=np.uint8)
+    rows[:, 1:] = image.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    with open(save_path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(rows.tobytes())))
+        f.write(chunk(b'IEND', b''))
 
 
 def wav_to_spectrogram(audio_path, save_path, spectrogram_dimensions=(64, 64), noverlap=16, cmap='gray_r'):
@@ -18,19 +100,21 @@ def wav_to_spectrogram(audio_path, save_path, spectrogram_dimensions=(64, 64), n
     """
 
     sample_rate, samples = wav.read(audio_path)
+    write_png(save_path, spectrogram_image(samples, spectrogram_dimensions, noverlap, cmap))
 
-    fig = plt.figure()
-    fig.set_size_inches((spectrogram_dimensions[0]/fig.get_dpi(), spectrogram_dimensions[1]/fig.get_dpi()))
-    ax = plt.Axes(fig, [0., 0., 1., 1.])
-    ax.set_axis_off()
-    fig.add_axes(ax)
-    ax.specgram(samples, cmap=cmap, Fs=2, noverlap=noverlap)
-    ax.xaxis.set_major_locator(plt.NullLocator())
-    ax.yaxis.set_major_locator(plt.NullLocator())
-    fig.savefig(save_path, bbox_inches="tight", pad_inches=0)
 
+def _spectrogram_job(job):
+    # Runs in a worker process: writes the PNG if there is a save_path, else returns the image
+    audio_path, save_path, spectrogram_dimensions, noverlap, cmap = job
+    sample_rate, samples = wav.read(audio_path)
+    image = spectrogram_image(samples, spectrogram_dimensions, noverlap, cmap)
+    if save_path is None:
+        return image
+    write_png(save_path, image)
 
-def dir_to_spectrogram(audio_dir, spectrogram_dir, spectrogram_dimensions=(64, 64), noverlap=16, cmap='gray_r'):
+
+def dir_to_spectrogram(audio_dir, spectrogram_dir, spectrogram_dimensions=(64, 64), noverlap=16, cmap='gray_r',
+                       packed_path=None, n_jobs=None):
     """ Creates spectrograms of all the audio files in a dir
 
     :param audio_dir: path of directory with audio files
@@ -38,15 +122,32 @@ def dir_to_spectrogram(audio_dir, spectrogram_dir, spectrogram_dimensions=(64, 6
     :param spectrogram_dimensions: tuple specifying the dimensions in pixes of the created spectrogram. default:(64,64)
     :param noverlap: See http://docs.scipy.org/doc/scipy/reference/generated/scipy.signal.spectrogram.html
     :param cmap: the color scheme to use for the spectrogram. Defaults to 'gray_r'
+    :param packed_path: if given, all spectrograms are saved to this one .npz file instead of PNGs, as a uint8
+        'spectrograms' array of shape (files, height, width[, 4]) and the matching 'file_names'
+    :param n_jobs: number of worker processes, None for every core
     :return:
     """
-    file_names = [f for f in listdir(audio_dir) if isfile(join(audio_dir, f)) and '.wav' in f]
+    file_names = sorted(f for f in listdir(audio_dir) if isfile(join(audio_dir, f)) and '.wav' in f)
+    jobs = [(audio_dir + file_name,
+             None if packed_path is not None else spectrogram_dir + file_name.replace('.wav', '.png'),
+             spectrogram_dimensions, noverlap, cmap) for file_name in file_names]
+
+    if n_jobs == 1:
+        images = [_spectrogram_job(job) for job in jobs]
+    else:
+        if n_jobs is None:
+            n_jobs = cpu_count()
+        # A few chunks per worker keeps them busy
+        pool = Pool(n_jobs)
+        try:
+            images = pool.map(_spectrogram_job, jobs, chunksize=max(1, len(jobs) // (4 * n_jobs)))
+        finally:
+            pool.close()
+            pool.join()
 
-    for file_name in file_names:
-        print(file_name)
-        audio_path = audio_dir + file_name
-        spectogram_path = spectrogram_dir + file_name.replace('.wav', '.png')
-        wav_to_spectrogram(audio_path, spectogram_path, spectrogram_dimensions=spectrogram_dimensions, noverlap=noverlap, cmap=cmap)
+    if packed_path is not None:
+        np.savez(packed_path, spectrograms=np.array(images, dtype=np.uint8), file_names=np.array(file_names))
+    print(len(file_names), 'spectrograms written')
 
 
 if __name__ == '__main__':
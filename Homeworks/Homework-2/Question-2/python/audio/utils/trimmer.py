@@ -1,6 +1,60 @@
+import numpy as np
 import scipy.io.wavfile
 
 
+def _zone_boundaries(audio, noise_threshold, previous_state=0):
+    """ Starts of the quiet and of the loud runs of the passed audio data.
+
+    A sample exactly at noise_threshold continues the run before it. previous_state is the state
+    (1 loud, -1 quiet, 0 none yet) the audio continues from, so a stream can be processed in blocks.
+
+    :return: (quiet run starts, loud run starts, state after the audio)
+    """
+    magnitude = np.abs(audio)
+    # 1 loud, -1 quiet, 0 exactly at the threshold
+    state = (magnitude > noise_threshold).astype(np.int8) - (magnitude < noise_threshold)
+
+    # Threshold samples take the state of the sample before them
+    at_threshold = np.flatnonzero(state == 0)
+    if len(at_threshold):
+        run_first = np.concatenate(([True], np.diff(at_threshold) != 1))
+        first_idx = at_threshold[run_first]
+        previous = np.where(first_idx > 0, state[first_idx - 1], previous_state)
+        run_lengths = np.diff(np.append(np.flatnonzero(run_first), len(at_threshold)))
+        state[at_threshold] = np.repeat(previous, run_lengths)
+
+    boundaries = np.flatnonzero(state[1:] != state[:-1]) + 1
+    if len(state) and state[0] != previous_state:
+        boundaries = np.concatenate(([0], boundaries))
+    quiet_starts = boundaries[state[boundaries] < 0]
+    loud_starts = boundaries[state[boundaries] > 0]
+    return quiet_starts, loud_starts, (int(state[-1]) if len(state) else previous_state)
+
+
+def _close_zones(quiet_starts, loud_starts):
+    # Pairs every quiet run start with the loud run start after it, returns the zones and the
+    # start of a zone that is still open at the end (None if there is none)
+    next_loud = np.searchsorted(loud_starts, quiet_starts)
+    closed = next_loud < len(loud_starts)
+    open_start = int(quiet_starts[-1]) if len(quiet_starts) and not closed[-1] else None
+    return quiet_starts[closed], loud_starts[next_loud[closed]], open_start
+
+
+def find_silence_zones(audio, noise_threshold=150):
+    """ Finds every silent zone of the passed audio data.
+
+    A zone starts at a sample quieter than noise_threshold and ends at the next louder one,
+    a zone the audio ends in is not closed and not returned.
+
+    :param audio: numpy array of audio data
+    :param noise_threshold: the maximum amount of noise that is considered silence
+    :return: a list of (start, stop) sample indices
+    """
+    quiet_starts, loud_starts, _ = _zone_boundaries(audio, noise_threshold)
+    starts, stops, _ = _close_zones(quiet_starts, loud_starts)
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
 def split_multiple_recordings(audio, min_silence_duration=0.25, noise_threshold=150, sample_rate_hz=8e3):
     """ Accepts a numpy array of audio data and splits it at the points of silence into multiple arrays of data.
 
@@ -11,25 +65,8 @@ def split_multiple_recordings(audio, min_silence_duration=0.25, noise_threshold=
     """
     # A list of tuples (start, stop)
     min_silence_frame = sample_rate_hz * min_silence_duration
-    silence_zones = []
-
-    zone_start = None
-    zone_end = None
-
-    for idx, point in enumerate(audio):
-        if abs(point) < noise_threshold and zone_start is None:
-            zone_start = idx
-
-        if abs(point) > noise_threshold and zone_start is not None:
-            zone_end = idx
-
-        # If we are in a silent zone and we come to the end point
-        if zone_start is not None and zone_end and abs(point) > noise_threshold:
-            if (zone_end - zone_start) > min_silence_frame:
-                silence_zones.append((zone_start, zone_end))
-
-            zone_start = None
-            zone_end = None
+    silence_zones = find_silence_zones(audio, noise_threshold)
+    silence_zones = [(start, stop) for start, stop in silence_zones if (stop - start) > min_silence_frame]
 
     # Split the recording by the zones
     split_recordings = []
@@ -52,20 +89,13 @@ def trim_silence(audio, noise_threshold=150):
     :param noise_threshold: the maximum amount of noise that is considered silence
     :return: a trimmed numpy array
     """
-    start = None
-    end = None
-
-    for idx, point in enumerate(audio):
-        if abs(point) > noise_threshold:
-            start = idx
-            break
-
-    # Reverse the array for trimming the end
-    for idx, point in enumerate(audio[::-1]):
-        if abs(point) > noise_threshold:
-            end = len(audio) - idx
-            break
+    loud = np.abs(audio) > noise_threshold
+    if not loud.any():
+        return audio[:]
 
+    # First loud sample from either end
+    start = np.argmax(loud)
+    end = len(audio) - np.argmax(loud[::-1])
     return audio[start:end]
 
 
@@ -81,23 +111,50 @@ def trim_silence_file(file_path, noise_threshold=150):
     scipy.io.wavfile.write(file_path, rate, trimmed_audio)
 
 
-def split_multiple_recordings_file(file_path, min_silence_duration=0.25, noise_threshold=150):
+def split_multiple_recordings_file(file_path, min_silence_duration=0.25, noise_threshold=150, block_size=2 ** 16):
     """Accepts a file_path of a `wav` file, splits it by it's silent periods and creates new files for each split.
     This is useful when contributing recordings, as it allwos one to record multiple pronunciations in one file and then
     split them programmaticly.
 
+    The file is memory-mapped and scanned block_size samples at a time, every split is written as soon as the
+    silence after it ends, so memory use does not grow with the length of the recording. The splits are the
+    ones of split_multiple_recordings.
+
     :param file_path: wav file path to  split
     :param min_silence_duration: the required period of silence to split the recording
     :param noise_threshold: the maximum amount of noise that is considered silence
-    :return:
+    :param block_size: number of samples scanned at a time
+    :return: a list of the written file paths
     """
-    rate, audio = scipy.io.wavfile.read(file_path)
-    split_recordings = split_multiple_recordings(audio, min_silence_duration=min_silence_duration,
-                                                 noise_threshold=noise_threshold, sample_rate_hz=rate)
-
     if file_path.count('.') != 1:
         raise Exception('File_path must contain exactly one period, usually in extension. IE: /home/test.wav')
 
-    for idx, recording in enumerate(split_recordings):
-        new_file_path = file_path.split('.')[0] + '_' + str(idx) + ".wav"
-        scipy.io.wavfile.write(new_file_path, rate, recording)
+    rate, audio = scipy.io.wavfile.read(file_path, mmap=True)
+    min_silence_frame = rate * min_silence_duration
+
+    written = []
+    state = 0
+    zone_start = None
+    split_start = 0
+    for block_start in range(0, len(audio), block_size):
+        quiet_starts, loud_starts, state = _zone_boundaries(audio[block_start:block_start + block_size],
+                                                            noise_threshold, state)
+        quiet_starts += block_start
+        loud_starts += block_start
+
+        starts, stops, open_start = _close_zones(quiet_starts, loud_starts)
+        # A zone left open by an earlier block ends at the first loud run of this one
+        if zone_start is not None and len(loud_starts):
+            starts = np.concatenate(([zone_start], starts))
+            stops = np.concatenate((loud_starts[:1], stops))
+        if zone_start is None or len(loud_starts):
+            zone_start = open_start
+
+        long_zones = (stops - starts) > min_silence_frame
+        for start, stop in zip(starts[long_zones].tolist(), stops[long_zones].tolist()):
+            new_file_path = file_path.split('.')[0] + '_' + str(len(written)) + ".wav"
+            scipy.io.wavfile.write(new_file_path, rate, np.array(audio[split_start:start]))
+            written.append(new_file_path)
+            split_start = stop
+
+    return written
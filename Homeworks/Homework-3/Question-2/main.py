@@ -6,14 +6,15 @@ from sklearn import metrics
 from matplotlib import pyplot as plt
 
 # Import your local utility functions
-from read_data import read_data
-from create_features import create_features
+from read_data import read_data, split_users, dataset_hash
+from create_features import FeatureStore, cached_features
 
 # --- PATH CONFIGURATION ---
 # This ensures the script looks for the 'Data' folder in the same directory as main.py
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 WISDM_PATH = os.path.join(BASE_DIR, "Data", "WISDM_ar_v1.1_raw.txt")
 KERAS_MODEL_DIR = os.path.join(BASE_DIR, "Models")
+FEATURE_STORE_DIR = os.path.join(BASE_DIR, "feature_cache")
 
 # Ensure the Models directory exists
 if not os.path.exists(KERAS_MODEL_DIR):
@@ -27,11 +28,13 @@ print(f"Loading data from: {WISDM_PATH}")
 data_df = read_data(WISDM_PATH)
 
 # Textbook split: Users <= 28 for training, > 28 for testing 
-df_train = data_df[data_df["user"] <= 28]
-df_test = data_df[data_df["user"] > 28]
+df_train, df_test = split_users(data_df, 28)
 
-train_segments_df, train_labels = create_features(df_train, TIME_PERIODS, STEP_DISTANCE)
-test_segments_df, test_labels = create_features(df_test, TIME_PERIODS, STEP_DISTANCE)
+# Features are reused from the store while the data and parameters are unchanged
+store = FeatureStore(FEATURE_STORE_DIR)
+data_hash = dataset_hash(WISDM_PATH)
+train_segments_df, train_labels = cached_features(store, data_hash, df_train, TIME_PERIODS, STEP_DISTANCE)
+test_segments_df, test_labels = cached_features(store, data_hash, df_test, TIME_PERIODS, STEP_DISTANCE)
 
 # --- MODEL DEFINITION (Section 10.7: Single Neuron) ---
 model = keras.models.Sequential([
@@ -8,7 +8,7 @@ import tensorflow as tf
 import sys
 
 # Ensure mfcc_func.py is in your C:\Users\ASUS\Desktop\Fall-2025\CSE 421\hw3\10.8\ folder
-from mfcc_func import create_mfcc_features
+from mfcc_func import MfccStore, cached_mfcc_features
 
 # --- 1. PATH CONFIGURATION ---
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -16,6 +16,7 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Based on your note "data files are inside the recordings file"
 # We check if they are in Data/recordings/ OR Data/recordings/recordings/
 FSDD_PATH = os.path.join(BASE_DIR, "Data", "recordings")
+MFCC_STORE_DIR = os.path.join(BASE_DIR, "mfcc_cache")
 
 # --- 2. VERIFY DATA ---
 if not os.path.exists(FSDD_PATH):
@@ -56,8 +57,10 @@ train_list = set(recordings_list) - test_list
 print(f"Training: {len(train_list)} files | Testing: {len(test_list)} files")
 print("Extracting MFCC features (Please wait)...")
 
-train_mfcc_features, train_labels = create_mfcc_features(train_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
-test_mfcc_features, test_labels = create_mfcc_features(test_list, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
+# Features already in the store are read from disk instead of being extracted again
+store = MfccStore(MFCC_STORE_DIR, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
+train_mfcc_features, train_labels = cached_mfcc_features(store, train_list)
+test_mfcc_features, test_labels = cached_mfcc_features(store, test_list)
 
 # --- 5. MODEL DEFINITION ---
 model = keras.models.Sequential([
@@ -1,67 +1,315 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
 import numpy as np
 import pandas as pd
 from scipy import stats
 
-def create_features(df, time_steps, step_size):
-    x_segments = []
-    y_segments = []
-    z_segments = []
-    labels = []
-    
-    # Iterate through the dataframe to create segments
-    for i in range(0, len(df) - time_steps, step_size):
-        xs = df["x-accel"].values[i : i + time_steps]
-        ys = df["y-accel"].values[i : i + time_steps]
-        zs = df["z-accel"].values[i : i + time_steps]
-
-        # Use the label that appears most frequently in this segment
-        label = df["activity"].iloc[i : i + time_steps].mode()[0]
-        
-        # Optional: Ensure segment belongs to one user/activity
-        # For simplicity, we assume the mode label represents the segment
-        x_segments.append(xs)
-        y_segments.append(ys)
-        z_segments.append(zs)
-        labels.append(label)
-
-    # Reshape segments
-    segments_df = pd.DataFrame({
-        "x_segments": x_segments,
-        "y_segments": y_segments,
-        "z_segments": z_segments
-    })
-    
-    feature_df = pd.DataFrame()
-    
-    # --- Time Domain Features ---
-    # 1. Mean
-    feature_df['x_mean'] = segments_df["x_segments"].apply(lambda x: x.mean())
-    feature_df['y_mean'] = segments_df["y_segments"].apply(lambda x: x.mean())
-    feature_df['z_mean'] = segments_df["z_segments"].apply(lambda x: x.mean())
-
-    # 2. Positive Count
-    feature_df['x_pos_count'] = segments_df["x_segments"].apply(lambda x: np.sum(x > 0))
-    feature_df['y_pos_count'] = segments_df["y_segments"].apply(lambda x: np.sum(x > 0))
-    feature_df['z_pos_count'] = segments_df["z_segments"].apply(lambda x: np.sum(x > 0))
-
-    # --- Frequency Domain Features (FFT) ---
+AXES = ["x-accel", "y-accel", "z-accel"]
+
+FEATURE_NAMES = [
+    "x_mean", "y_mean", "z_mean",
+    "x_pos_count", "y_pos_count", "z_pos_count",
+    "x_std_fft", "y_std_fft", "z_std_fft",
+    "sma_fft"
+]
+
+# FFT SMA scaling: 32 on the MCU (C code) path, 50 in the book
+SMA_SCALE_MCU = 32.0
+SMA_SCALE_BOOK = 50.0
+
+# Bump when the feature definitions change, older FeatureStore entries are then never hit
+FEATURE_VERSION = 1
+
+def _activity_codes(activity):
+    # Integer code per sample plus the (sorted) class table the codes index into
+    codes, classes = pd.factorize(activity, sort=True)
+    return codes, np.asarray(classes)
+
+class RunIndex:
+    """
+    Run-length index over one or more per-sample key columns (e.g. activity and user).
+
+    A run is a maximal stretch of consecutive samples where no key changes.
+    Built once in O(n); after that a window [i, i + T) is single-run iff its
+    first and last sample share a run id, which is an O(1) check.
+    """
+
+    def __init__(self, *keys):
+        self.length = len(keys[0])
+        change = np.zeros(max(self.length - 1, 0), dtype=bool)
+        for key in keys:
+            key = np.asarray(key)
+            change |= key[1:] != key[:-1]
+
+        self.run_id = np.concatenate(([0], np.cumsum(change)))
+        self.run_starts = np.concatenate(([0], np.flatnonzero(change) + 1))
+        self.run_ends = np.append(self.run_starts[1:], self.length)
+
+    def is_pure(self, start, time_steps):
+        return self.run_id[start] == self.run_id[start + time_steps - 1]
+
+    def valid_starts(self, time_steps, step_size):
+        """
+        All starts of range(0, length - time_steps, step_size) whose window
+        stays inside one run, computed per run instead of per window.
+        """
+        last_start = self.length - time_steps - 1
+        first = -(-self.run_starts // step_size) * step_size
+        last = np.minimum(self.run_ends - time_steps, last_start)
+        counts = np.maximum((last - first) // step_size + 1, 0)
+
+        # Expand every run's [first, last] grid in one go
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(first, counts) + offsets * step_size
+
+def window_starts(df, time_steps, step_size, pure=True):
+    """
+    Start row and label of every window that is kept.
+
+    Window starts come from range(0, len(df) - time_steps, step_size) and
+    windows that straddle a user change are rejected. If pure is True only
+    windows with a single activity are kept, otherwise every window is
+    labelled with its most frequent activity.
+    """
+    codes, classes = _activity_codes(df["activity"])
+    users = df["user"].to_numpy()
+
+    if pure:
+        starts = RunIndex(codes, users).valid_starts(time_steps, step_size)
+        return starts, classes[codes[starts]]
+
+    starts = RunIndex(users).valid_starts(time_steps, step_size)
+    if len(starts) == 0:
+        return starts, classes[:0]
+    # Most frequent code per window, ties go to the first class (like mode())
+    code_windows = np.lib.stride_tricks.sliding_window_view(codes, time_steps)[starts]
+    counts = np.stack([(code_windows == c).sum(axis=1) for c in range(len(classes))], axis=1)
+    return starts, classes[counts.argmax(axis=1)]
+
+def _gather_windows(values, starts, time_steps):
+    if len(starts) == 0:
+        return np.empty((0, time_steps, values.shape[1]), values.dtype)
+    # (n_windows, 3, time_steps) strided views -> (n_windows, time_steps, 3)
+    windows = np.lib.stride_tricks.sliding_window_view(values, time_steps, axis=0)[starts]
+    return np.ascontiguousarray(windows.transpose(0, 2, 1))
+
+def segment_windows(df, time_steps, step_size, pure=True):
+    """
+    Cuts the dataframe into (n_windows, time_steps, 3) windows in one pass.
+
+    Windows are strided views over the x/y/z columns, so only the windows
+    kept by window_starts are copied.
+    """
+    starts, labels = window_starts(df, time_steps, step_size, pure)
+    return _gather_windows(df[AXES].to_numpy(), starts, time_steps), labels
+
+def compute_features(windows, fft_stop, sma_scale):
+    """
+    Computes the 10 HAR features for a whole (n_windows, time_steps, 3) tensor.
+
+    A single rfft runs over the time axis of every window and axis, the
+    features are plain array reductions. FFT bins [1:fft_stop] are used.
+    Returns a float32 (n_windows, 10) matrix ordered as FEATURE_NAMES.
+    """
+    mean = windows.mean(axis=1)
+    pos_count = (windows > 0).sum(axis=1)
+    std_fft, sma_fft = _spectrum_features(windows, fft_stop, sma_scale)
+
+    return np.column_stack([mean, pos_count, std_fft, sma_fft]).astype(np.float32)
+
+def _spectrum_features(windows, fft_stop, sma_scale):
+    # FFT std dev per axis and FFT signal magnitude area of every window,
+    # shared by compute_features and sweep_features
+    spectrum = np.abs(np.fft.rfft(windows, axis=1))[:, 1:fft_stop, :]
+    return spectrum.std(axis=1), spectrum.sum(axis=(1, 2)) / sma_scale
+
+def _shard_features(shm_name, shape, dtype, starts, time_steps, fft_stop, sma_scale):
+    # Runs in a worker process, the x/y/z samples are read from shared memory
+    shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    try:
+        return compute_features(_gather_windows(values, starts, time_steps), fft_stop, sma_scale)
+    finally:
+        del values
+        shm.close()
+
+def parallel_features(df, starts, time_steps, fft_stop, sma_scale, n_jobs=None):
+    """
+    compute_features for the windows at starts, computed in worker processes.
+
+    Work is sharded by user, one shard per user block. Workers read the x/y/z
+    samples from a single shared memory block instead of a pickled dataframe.
+    Shards are merged in start order, so the result is identical to the
+    serial path. n_jobs=None or -1 uses every core, other values below 1
+    raise ValueError. With a single shard or worker the features are computed
+    in this process, without a pool.
+    """
+    if n_jobs is None or n_jobs == -1:
+        n_jobs = os.cpu_count()
+    elif n_jobs < 1:
+        raise ValueError(f"n_jobs must be None, -1 or a positive number of processes, got {n_jobs}")
+    if len(starts) == 0:
+        return np.empty((0, len(FEATURE_NAMES)), np.float32)
+
+    values = np.ascontiguousarray(df[AXES].to_numpy())
+    users = df["user"].to_numpy()[starts]
+    shards = np.split(starts, np.flatnonzero(users[1:] != users[:-1]) + 1)
+    if min(n_jobs, len(shards)) == 1:
+        return compute_features(_gather_windows(values, starts, time_steps), fft_stop, sma_scale)
+
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    try:
+        np.ndarray(values.shape, values.dtype, buffer=shm.buf)[:] = values
+        with ProcessPoolExecutor(max_workers=min(n_jobs, len(shards))) as pool:
+            features = list(pool.map(_shard_features, repeat(shm.name), repeat(values.shape),
+                                     repeat(values.dtype.str), shards, repeat(time_steps),
+                                     repeat(fft_stop), repeat(sma_scale)))
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return np.concatenate(features)
+
+class FeatureStore:
+    """
+    On-disk cache of feature matrices and labels, one .npz file per key.
+
+    Keys are content addressed (see key), so a changed dataset or feature
+    parameter simply misses the cache. Entries older than max_age seconds
+    are evicted, then the least recently used ones until the store fits
+    in max_bytes. Either limit can be None.
+    """
+
+    def __init__(self, store_dir, max_bytes=None, max_age=None):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        os.makedirs(store_dir, exist_ok=True)
+
+    @staticmethod
+    def key(**parts):
+        return hashlib.sha1(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.store_dir, key + ".npz")
+
+    def load(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                feature_df = pd.DataFrame(entry["features"], columns=list(entry["columns"]))
+                labels = entry["labels"]
+                if labels.dtype.kind == "U":
+                    labels = labels.astype(object)
+        except (OSError, ValueError, KeyError):
+            return None
+        # The access time drives least recently used eviction
+        os.utime(path)
+        return feature_df, labels
+
+    def save(self, key, feature_df, labels):
+        # Written under a temporary name first so readers never see half a file
+        tmp_path = self._path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, features=feature_df.to_numpy(), columns=np.asarray(feature_df.columns, dtype=str),
+                     labels=np.asarray(labels, dtype=str if labels.dtype == object else labels.dtype))
+        os.replace(tmp_path, self._path(key))
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.store_dir):
+            if name.endswith(".npz"):
+                stat = os.stat(os.path.join(self.store_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        entries.sort()
+
+        now = time.time()
+        total = sum(size for _, size, _ in entries)
+        for mtime, size, name in entries:
+            too_old = self.max_age is not None and now - mtime > self.max_age
+            too_big = self.max_bytes is not None and total > self.max_bytes
+            if not (too_old or too_big):
+                continue
+            os.remove(os.path.join(self.store_dir, name))
+            total -= size
+
+def create_features(df, time_steps, step_size, sma_scale=SMA_SCALE_BOOK, n_jobs=1):
+    # Use the label that appears most frequently in each segment
+    # For simplicity, we assume the mode label represents the segment
+    # Time domain (mean, positive count) and FFT (std, SMA) features
+    # Book logic: SMA is the sum of absolute values divided by 50 (normalization factor)
+    # n_jobs other than 1 extracts the features in worker processes, one user per shard
     FFT_SIZE = time_steps // 2 + 1
-    
-    x_fft_series = segments_df["x_segments"].apply(lambda x: np.abs(np.fft.fft(x))[1:FFT_SIZE])
-    y_fft_series = segments_df["y_segments"].apply(lambda x: np.abs(np.fft.fft(x))[1:FFT_SIZE])
-    z_fft_series = segments_df["z_segments"].apply(lambda x: np.abs(np.fft.fft(x))[1:FFT_SIZE])
+    if n_jobs == 1:
+        windows, labels = segment_windows(df, time_steps, step_size, pure=False)
+        features = compute_features(windows, FFT_SIZE, sma_scale)
+    else:
+        starts, labels = window_starts(df, time_steps, step_size, pure=False)
+        features = parallel_features(df, starts, time_steps, FFT_SIZE, sma_scale, n_jobs)
+    feature_df = pd.DataFrame(features, columns=FEATURE_NAMES)
+
+    return feature_df, labels
+
+def sweep_features(df, grid, sma_scale=SMA_SCALE_BOOK):
+    """
+    create_features for every (time_steps, step_size) pair in grid, returned
+    as a dict {(time_steps, step_size): (feature_df, labels)}.
+
+    Cumulative sums of the samples and of their positive indicators are built
+    once for the whole sweep, so the mean and positive count of any window
+    are two lookups instead of a pass over its samples. Per-class activity
+    counts are cumulated the same way for the mode labels. Only the FFT
+    features are computed per window, by the same code as in compute_features.
+    """
+    values = df[AXES].to_numpy()
+    codes, classes = _activity_codes(df["activity"])
+    sums = np.zeros((len(values) + 1, 3))
+    np.cumsum(values, axis=0, dtype=np.float64, out=sums[1:])
+    positives = np.zeros((len(values) + 1, 3), np.int64)
+    np.cumsum(values > 0, axis=0, out=positives[1:])
+    index = RunIndex(df["user"].to_numpy())
+    class_counts = np.zeros((len(values) + 1, len(classes)), np.int32)
+    np.cumsum(codes[:, None] == np.arange(len(classes)), axis=0, out=class_counts[1:])
+
+    sweep = {}
+    for time_steps, step_size in grid:
+        starts = index.valid_starts(time_steps, step_size)
+        ends = starts + time_steps
+        mean = (sums[ends] - sums[starts]) / time_steps
+        pos_count = positives[ends] - positives[starts]
+        # Most frequent activity, ties go to the first class like window_starts
+        labels = classes[(class_counts[ends] - class_counts[starts]).argmax(axis=1)]
+        windows = _gather_windows(values, starts, time_steps)
+        std_fft, sma_fft = _spectrum_features(windows, time_steps // 2 + 1, sma_scale)
 
-    # 3. FFT Standard Deviation
-    feature_df['x_std_fft'] = x_fft_series.apply(lambda x: x.std())
-    feature_df['y_std_fft'] = y_fft_series.apply(lambda x: x.std())
-    feature_df['z_std_fft'] = z_fft_series.apply(lambda x: x.std())
+        features = np.column_stack([mean, pos_count, std_fft, sma_fft]).astype(np.float32)
+        sweep[(time_steps, step_size)] = (pd.DataFrame(features, columns=FEATURE_NAMES), labels)
+    return sweep
 
-    # 4. FFT Signal Magnitude Area (SMA)
-    # Book logic: Sum of absolute values divided by 50 (normalization factor)
-    feature_df['sma_fft'] = x_fft_series.apply(lambda x: np.sum(np.abs(x)/50)) + \
-                            y_fft_series.apply(lambda x: np.sum(np.abs(x)/50)) + \
-                            z_fft_series.apply(lambda x: np.sum(np.abs(x)/50))
+def _rows_hash(df):
+    # Identifies the rows of df, so two slices of the same users (or of the same
+    # file with other rows dropped) never share a cache entry
+    return hashlib.sha1(pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes()).hexdigest()
 
-    labels = np.asarray(labels)
+def cached_features(store, data_hash, df, time_steps, step_size, sma_scale=SMA_SCALE_BOOK, n_jobs=1):
+    """
+    create_features through a FeatureStore. The key covers the raw file hash
+    (see dataset_hash), the users and rows of df, the segmentation parameters,
+    the feature set version and the SMA scaling.
+    """
+    key = store.key(data_hash=data_hash, users=np.unique(df["user"].to_numpy()).tolist(), rows=_rows_hash(df),
+                    time_steps=time_steps, step_size=step_size, fft_stop=time_steps // 2 + 1,
+                    version=FEATURE_VERSION, sma_scale=sma_scale)
+    cached = store.load(key)
+    if cached is not None:
+        return cached
 
-    return feature_df, labels
\ No newline at end of file
+    feature_df, labels = create_features(df, time_steps, step_size, sma_scale, n_jobs)
+    store.save(key, feature_df, labels)
+    return feature_df, labels
@@ -16,8 +16,8 @@ from sklearn.metrics import confusion_matrix, ConfusionMatrixDisplay
 from sklearn.preprocessing import OneHotEncoder
 
 # Import local utility functions
-from data_utils import read_data
-from feature_utils import create_features
+from data_utils import read_data, split_users, dataset_hash
+from feature_utils import FeatureStore, cached_features
 
 # --- CONFIGURATION & PATH FIX ---
 # Get the directory where THIS script (main.py) is located
@@ -27,6 +27,7 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # This works regardless of where you run the terminal command from
 WISDM_PATH = os.path.join(SCRIPT_DIR, "data", "WISDM_ar_v1.1_raw.txt")
 MODEL_DIR = os.path.join(SCRIPT_DIR, "Models")
+FEATURE_STORE_DIR = os.path.join(SCRIPT_DIR, "feature_cache")
 
 # Ensure model directory exists
 if not os.path.exists(MODEL_DIR):
@@ -51,18 +52,20 @@ def main():
         return
 
     # 2. Split Data (Train on User IDs <= 28, Test on > 28)
-    df_train = data_df[data_df["user"] <= 28]
-    df_test = data_df[data_df["user"] > 28]
+    df_train, df_test = split_users(data_df, 28)
 
     print(f"Training samples: {len(df_train)}")
     print(f"Testing samples: {len(df_test)}")
 
-    # 3. Create Features
+    # 3. Create Features (reused from the feature store when nothing changed)
+    store = FeatureStore(FEATURE_STORE_DIR)
+    data_hash = dataset_hash(WISDM_PATH)
+
     print("Extracting features from training data...")
-    train_segments_df, train_labels = create_features(df_train, TIME_PERIODS, STEP_DISTANCE)
+    train_segments_df, train_labels = cached_features(store, data_hash, df_train, TIME_PERIODS, STEP_DISTANCE)
     
     print("Extracting features from testing data...")
-    test_segments_df, test_labels = create_features(df_test, TIME_PERIODS, STEP_DISTANCE)
+    test_segments_df, test_labels = cached_features(store, data_hash, df_test, TIME_PERIODS, STEP_DISTANCE)
 
     # 4. Prepare Data for Neural Network
     train_segments_np = train_segments_df.to_numpy()
@@ -16,7 +16,7 @@ from sklearn.preprocessing import OneHotEncoder
 from matplotlib import pyplot as plt
 
 # Import local module
-from mfcc_func import create_mfcc_features
+from mfcc_func import MfccStore, cached_mfcc_features
 
 # --- CONFIGURATION ---
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -24,6 +24,8 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 # Data is expected in: project/data/recordings/*.wav
 DATA_DIR = os.path.join(SCRIPT_DIR, "data", "recordings")
 MODEL_DIR = os.path.join(SCRIPT_DIR, "models")
+# Extracted MFCCs, one row per recording (see MfccStore)
+MFCC_STORE_DIR = os.path.join(SCRIPT_DIR, "mfcc_cache")
 
 # Ensure models directory exists
 if not os.path.exists(MODEL_DIR):
@@ -58,16 +60,13 @@ def main():
     print(f"Training samples: {len(train_files)}")
     print(f"Testing samples: {len(test_files)}")
 
-    # 4. Extract Features
+    # 4. Extract Features (recordings already in the store are not extracted again)
+    store = MfccStore(MFCC_STORE_DIR, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
     print("Creating Training Features...")
-    train_mfcc_features, train_labels = create_mfcc_features(
-        train_files, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window
-    )
+    train_mfcc_features, train_labels = cached_mfcc_features(store, train_files)
     
     print("Creating Testing Features...")
-    test_mfcc_features, test_labels = create_mfcc_features(
-        test_files, FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window
-    )
+    test_mfcc_features, test_labels = cached_mfcc_features(store, test_files)
 
     # 5. Define Model
     # Input shape is 26 (13 DCT outputs * 2 frames)
@@ -0,0 +1,206 @@
+import os
+import time
+
+# Same TensorFlow setup as main.py (must be done before importing TensorFlow)
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+import numpy as np
+import scipy.signal as sig
+import tensorflow as tf
+from scipy.io import wavfile
+
+from mfcc_func import FrameMfcc, recording_label
+
+# Streaming keyword spotting on the host with the MLP trained by main.py.
+# A simulated 8 kHz source delivers audio blocks into a ring buffer. Every HOP samples the
+# last 2 * FFTSize samples become the 26 MFCC features the model was trained on, and
+# the posteriors are averaged over the last SMOOTH_HOPS hops. The second frame of a window
+# is the first frame of the window FFTSize / HOP hops later, so its MFCCs are kept and
+# only rescaled to the new window's peak. Reports the latency of
+# every stage, the end-to-end latency and the real-time factor.
+
+# --- CONFIGURATION ---
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(SCRIPT_DIR, "data", "recordings")
+MODEL_PATH = os.path.join(SCRIPT_DIR, "models", "kws_mlp.h5")
+
+FFTSize = 1024
+sample_rate = 8000
+numOfMelFilters = 20
+numOfDctOutputs = 13
+window = sig.get_window("hamming", FFTSize)
+
+BLOCK = 256           # Samples per audio block, as a DMA half-buffer delivers them
+HOP = 512             # Samples between classifications
+SMOOTH_HOPS = 4       # Posteriors are averaged over this many hops
+THRESHOLD = 0.8       # Smoothed posterior needed to report a keyword
+MIN_PEAK = 1000       # Windows quieter than this (int16 peak) are silence, not classified
+GAP_SECONDS = 0.5     # Silence between the keywords of the simulated stream
+NUM_KEYWORDS = 50     # Test recordings (speaker 'yweweler') in the simulated stream
+REALTIME = False      # True paces the source at sample_rate, False runs as fast as possible
+NUM_CLASSES = 10
+
+STAGES = ["ingest", "mfcc", "inference", "smoothing"]
+
+class RingBuffer:
+    """
+    The newest samples of a stream in a fixed array, so writing a block and
+    reading the current window never allocate.
+    """
+
+    def __init__(self, size):
+        self.data = np.zeros(size, dtype=np.float32)
+        # Samples written so far
+        self.pos = 0
+
+    def write(self, block):
+        size = len(self.data)
+        start = self.pos % size
+        first = min(len(block), size - start)
+        self.data[start:start + first] = block[:first]
+        self.data[:len(block) - first] = block[first:]
+        self.pos += len(block)
+
+    def latest(self, out):
+        # The newest len(out) samples, oldest first
+        size = len(self.data)
+        start = (self.pos - len(out)) % size
+        first = min(len(out), size - start)
+        out[:first] = self.data[start:start + first]
+        out[first:] = self.data[:len(out) - first]
+        return out
+
+def simulated_stream(recordings_list):
+    # Keywords separated by silence, cut into blocks. Also returns the
+    # (first sample, last sample, digit) of every keyword to score detections against
+    gap = np.zeros(int(GAP_SECONDS * sample_rate), dtype=np.int16)
+    parts = [gap]
+    keywords = []
+    pos = len(gap)
+    for wav_path in recordings_list:
+        _, data = wavfile.read(wav_path)
+        keywords.append((pos, pos + len(data), recording_label(wav_path)))
+        parts += [data, gap]
+        pos += len(data) + len(gap)
+    stream = np.concatenate(parts)
+    stream = np.pad(stream, (0, -len(stream) % BLOCK))
+    return stream.reshape(-1, BLOCK), keywords
+
+def paced_blocks(blocks):
+    # Yields (block, arrival time), at the rate of the audio with REALTIME
+    start = time.perf_counter()
+    for block_idx, block in enumerate(blocks):
+        if REALTIME:
+            wait = start + (block_idx + 1) * BLOCK / sample_rate - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+        yield block, time.perf_counter()
+
+def summary_ms(seconds):
+    ms = np.array(seconds) * 1e3
+    return f"mean {ms.mean():7.3f}  p50 {np.median(ms):7.3f}  p99 {np.percentile(ms, 99):7.3f}  max {ms.max():7.3f} ms"
+
+def main():
+    if not os.path.exists(MODEL_PATH):
+        print(f"Error: Model not found at {MODEL_PATH}, run main.py first")
+        return
+    model = tf.keras.models.load_model(MODEL_PATH)
+
+    test_files = sorted(os.path.join(DATA_DIR, f) for f in os.listdir(DATA_DIR)
+                        if f.endswith(".wav") and "yweweler" in f)[:NUM_KEYWORDS]
+    blocks, keywords = simulated_stream(test_files)
+    audio_seconds = blocks.size / sample_rate
+    print(f"Streaming {len(keywords)} keywords, {audio_seconds:.1f} s of audio "
+          f"(block {BLOCK}, hop {HOP}, window {2 * FFTSize} samples)")
+
+    # Everything the loop needs is allocated up front
+    frame_mfcc = FrameMfcc(FFTSize, sample_rate, numOfMelFilters, numOfDctOutputs, window)
+    window_samples = np.zeros(2 * FFTSize, dtype=np.float32)
+    # MFCCs of unnormalized frames, by the stream position of their first sample
+    frame_cache = {}
+    ring = RingBuffer(max(2 * FFTSize, BLOCK))
+    features = np.zeros((1, 2 * numOfDctOutputs), dtype=np.float32)
+    posteriors = np.zeros((SMOOTH_HOPS, NUM_CLASSES), dtype=np.float32)
+
+    timings = {stage: [] for stage in STAGES}
+    end_to_end = []
+    detections = []
+    active = False
+    next_hop = 2 * FFTSize
+    hop_idx = 0
+
+    for block, arrival in paced_blocks(blocks):
+        t_start = time.perf_counter()
+        ring.write(block)
+        t_ingest = time.perf_counter()
+        timings["ingest"].append(t_ingest - t_start)
+        if ring.pos < next_hop:
+            continue
+        next_hop += HOP
+
+        # Same features as create_mfcc_features: the window normalized by its peak,
+        # MFCCs of both halves. The frames are transformed unnormalized, so a cached
+        # frame is valid in any later window, and rescaled to this window's peak
+        ring.latest(window_samples)
+        peak = max(window_samples.max(), -window_samples.min())
+        silent = peak < MIN_PEAK
+        first_start = ring.pos - 2 * FFTSize
+        first_mfcc = frame_cache.pop(first_start, None)
+        for start in [start for start in frame_cache if start < first_start]:
+            del frame_cache[start]
+        if not silent:
+            if first_mfcc is None:
+                first_mfcc = frame_mfcc(window_samples[:FFTSize])
+            second_mfcc = frame_mfcc(window_samples[FFTSize:])
+            frame_cache[first_start + FFTSize] = second_mfcc
+            for half, mfcc in enumerate((first_mfcc, second_mfcc)):
+                # An all-zero frame (the silence between keywords) is at the log floor,
+                # which no gain moves
+                if window_samples[half * FFTSize:(half + 1) * FFTSize].any():
+                    mfcc = frame_mfcc.rescale(mfcc, 1 / peak)
+                features[0, half * numOfDctOutputs:(half + 1) * numOfDctOutputs] = mfcc
+        t_mfcc = time.perf_counter()
+
+        if silent:
+            posteriors[hop_idx % SMOOTH_HOPS] = 0
+        else:
+            posteriors[hop_idx % SMOOTH_HOPS] = model(features, training=False).numpy()[0]
+        t_inference = time.perf_counter()
+
+        # A keyword is reported once when the smoothed posterior rises above THRESHOLD
+        smoothed = posteriors.mean(axis=0)
+        digit = int(smoothed.argmax())
+        if smoothed[digit] >= THRESHOLD and not active:
+            detections.append((ring.pos, digit, float(smoothed[digit])))
+        active = smoothed[digit] >= THRESHOLD
+        t_smoothing = time.perf_counter()
+        hop_idx += 1
+
+        timings["mfcc"].append(t_mfcc - t_ingest)
+        timings["inference"].append(t_inference - t_mfcc)
+        timings["smoothing"].append(t_smoothing - t_inference)
+        end_to_end.append(t_smoothing - arrival)
+
+    # A keyword is found if its digit is detected while its window can still cover it
+    late = 2 * FFTSize + SMOOTH_HOPS * HOP
+    found = sum(any(first <= pos <= last + late and digit == label for pos, digit, _ in detections)
+                for first, last, label in keywords)
+
+    processing = sum(sum(stage_times) for stage_times in timings.values())
+    print(f"\nDetections: {len(detections)}, keywords found: {found}/{len(keywords)}")
+    print(f"Real-time factor: {processing / audio_seconds:.4f} "
+          f"({processing:.2f} s processing for {audio_seconds:.1f} s of audio)")
+    print("\nPer-stage latency (ingest per block, others per hop):")
+    for stage in STAGES:
+        share = sum(timings[stage]) / processing
+        print(f"  {stage:>9}: {summary_ms(timings[stage])}  ({share:.0%} of processing)")
+    print(f"  {'total':>9}: {summary_ms(end_to_end)}  (block arrival to smoothed posterior)")
+
+    buffering = 2 * FFTSize / sample_rate
+    smoothing_delay = (SMOOTH_HOPS - 1) * HOP / 2 / sample_rate
+    print(f"\nAlgorithmic latency: block {BLOCK / sample_rate * 1e3:.0f} ms + window {buffering * 1e3:.0f} ms "
+          f"+ smoothing delay {smoothing_delay * 1e3:.0f} ms, hop deadline {HOP / sample_rate * 1e3:.0f} ms")
+
+if __name__ == "__main__":
+    main()